@@ -32,6 +32,7 @@ VIN → 3.3V
 GND → GND
 SDA → SD2
 SCL → SC2
+INT1 → spare GPIO (optional, activity interrupt; see ADXL345_INT_PIN)
 
 5. TCA9548A I²C Multiplexer
 SDA → ESP32 SDA
@@ -45,14 +46,18 @@ from machine import I2C, Pin, ADC
 import time
 import ujson
 import ustruct
+import array
+import math
 import network
-import urequests
+import uasyncio as asyncio
 import gc
+import micropython
+from micropython import const
 
 # --- Constants for estimation ---
 
-SAMPLE_RATE_HZ = 10            # actual effective sampling rate
-SLEEP_MS = 1000 // SAMPLE_RATE_HZ
+SAMPLE_RATE_HZ = const(10)            # actual effective sampling rate
+SLEEP_MS = const(1000 // SAMPLE_RATE_HZ)
 
 ##################################################
 # 1. TCA9548A MULTIPLEXER
@@ -60,13 +65,33 @@ SLEEP_MS = 1000 // SAMPLE_RATE_HZ
 #    This multiplexer selects one of 8 I2C channels.
 ##################################################
 
-TCA_ADDR = 0x70
+TCA_ADDR = const(0x70)
+
+# Channel-select bytes, built once so selecting a channel allocates nothing
+_TCA_BYTES = (b'\x01', b'\x02', b'\x04', b'\x08', b'\x10', b'\x20', b'\x40', b'\x80')
+
+# Channels used by the streaming loop: CH0 MAX30102, CH1 HDC1080, CH2 ADXL345
+_TCA_SEL0 = _TCA_BYTES[0]
+_TCA_SEL1 = _TCA_BYTES[1]
+_TCA_SEL2 = _TCA_BYTES[2]
+
+# Last channel written to the TCA9548A (-1 = unknown, forces the next write)
+_tca_current = -1
 
 def tca_select(i2c, channel):   # we can use channel 0-7
+    global _tca_current
+    if channel == _tca_current:
+        return  # Already routed to this channel, skip the write + settling
     if channel > 7:
         return
-    i2c.writeto(TCA_ADDR, bytes([1 << channel]))
-    time.sleep_ms(5)  # Required settling time
+    try:
+        i2c.writeto(TCA_ADDR, _TCA_BYTES[channel])
+    except OSError:
+        # Mux state is unknown after a failed write; resync on the next call
+        _tca_current = -1
+        raise
+    # No settling delay: the switch takes effect at the STOP of the write
+    _tca_current = channel
 
 
 ##################################################
@@ -75,33 +100,78 @@ def tca_select(i2c, channel):   # we can use channel 0-7
 #    Temperature & humidity sensor
 ##################################################
 
-HDC1080_ADDR = 0x40
+HDC1080_ADDR = const(0x40)
+
+# Writing the temperature pointer starts a conversion; in sequential mode
+# (config MODE=1) it converts temperature and humidity back to back and both
+# results are read in one 4-byte burst
+HDC1080_REG_TEMP = b'\x00'
+HDC1080_REG_CONFIG = const(0x02)
+HDC1080_CONFIG_SEQ = b'\x10\x00'      # MODE=1, 14-bit temperature and humidity
+
+HDC1080_CONV_MS = const(15)             # 14-bit temp + humidity (datasheet: 6.35 + 6.5 ms)
 
 class HDC1080:
+    """
+    HDC1080 driver with non-blocking conversions.
+
+    The sensor runs in sequential mode, so one trigger converts temperature
+    and humidity and one read returns both. A conversion is started with
+    start_conversion() and collected later with fetch_result() / collect(),
+    so the conversion time can be spent reading the other sensors instead
+    of sleeping.
+    """
+
     def __init__(self, i2c):
         self.i2c = i2c
+        self.i2c.writeto_mem(HDC1080_ADDR, HDC1080_REG_CONFIG, HDC1080_CONFIG_SEQ)
+        self._t_ready = time.ticks_ms()   # Tick at which the pending result is valid
+        self._pending = False             # A conversion was triggered and not read yet
+        self._buf4 = bytearray(4)         # Reused receive buffer: temp (2) + humidity (2)
+
+        # Latest raw 16-bit codes collected by collect()
+        # (None until measured); the server converts them to degC / %RH
+        self.temp_raw = None
+        self.humi_raw = None
+
+    def start_conversion(self):
+        self.i2c.writeto(HDC1080_ADDR, HDC1080_REG_TEMP)
+        self._t_ready = time.ticks_add(time.ticks_ms(), HDC1080_CONV_MS)
+        self._pending = True
+
+    def _fetch_raw(self):        # Read raw temperature and humidity of the pending conversion
+        remaining = time.ticks_diff(self._t_ready, time.ticks_ms())
+        if remaining > 0:
+            # Not enough work was overlapped, wait out the rest
+            time.sleep_ms(remaining)
+        d = self._buf4
+        self.i2c.readfrom_into(HDC1080_ADDR, d)
+        self._pending = False
+        return (d[0] << 8) | d[1], (d[2] << 8) | d[3]
+
+    def fetch_result(self):
+        t_raw, h_raw = self._fetch_raw()
+        temp_c = (t_raw / 65536.0) * 165.0 - 40.0
+        humidity = (h_raw / 65536.0) * 100.0
+        return temp_c, humidity
+
+    def collect(self):
+        """
+        Collect the conversion started by start_conversion() into temp_raw / humi_raw.
+        Does nothing if no conversion is pending.
+        """
+        if self._pending:
+            self.temp_raw, self.humi_raw = self._fetch_raw()
 
-    def _read_temp_raw(self):    # Read raw temperature value (16-bit)
-        self.i2c.writeto(HDC1080_ADDR, b'\x00')
-        time.sleep_ms(15)
-        d = self.i2c.readfrom(HDC1080_ADDR, 2)
-        return (d[0] << 8) | d[1]
-
-    def _read_humi_raw(self):    # Read raw humidity value (16-bit)
-        self.i2c.writeto(HDC1080_ADDR, b'\x01')
-        time.sleep_ms(15)
-        d = self.i2c.readfrom(HDC1080_ADDR, 2)
-        return (d[0] << 8) | d[1]
+    def read_both(self):
+        self.start_conversion()
+        return self.fetch_result()
 
     def read_temp_c(self):
-        raw = self._read_temp_raw()
-        temp_c = (raw / 65536.0) * 165.0 - 40.0
-        return temp_c
+        return self.read_both()[0]
 
     def read_humi_rh(self):
-        raw = self._read_humi_raw()
-        humidity = (raw / 65536.0) * 100.0
-        return humidity
+        return self.read_both()[1]
 
 
 ##################################################
@@ -111,86 +181,287 @@ class HDC1080:
 ##################################################
 
 # MAX30102 I2C address
-MAX30102_ADDR = 0x57
+MAX30102_ADDR = const(0x57)
 
 # --- Algorithm related constants ---
-WINDOW_SECONDS = 8             # Length of HR analysis window (seconds)
-MIN_WINDOW_SECONDS = 4         # HR estimation minimal data length (seconds)
-MAX_SAMPLES = SAMPLE_RATE_HZ * WINDOW_SECONDS
+WINDOW_SECONDS = const(8)             # Length of HR analysis window (seconds)
+MIN_WINDOW_SECONDS = const(4)         # HR estimation minimal data length (seconds)
 
 # The actual internal sample rate of MAX30102 (set by register 0x0A)
-SENSOR_SAMPLE_RATE_HZ = 100
-
-# Simple integer downsampling factor. Avoid overwhelming the ESP32. TODO: try different rates
-DOWNSAMPLE_FACTOR = SENSOR_SAMPLE_RATE_HZ // SAMPLE_RATE_HZ
+SENSOR_SAMPLE_RATE_HZ = const(200)
+
+# On-chip sample averaging (SMP_AVE, register 0x08). The sensor averages this
+# many samples into each FIFO entry, so it delivers a pre-filtered stream
+# close to SAMPLE_RATE_HZ and the ESP32 never reads the discarded samples.
+PPG_SAMPLE_AVERAGING = const(16)
+
+# Effective rate of the FIFO output / PPG windows (200 / 16 = 12.5 Hz)
+PPG_RATE_HZ = SENSOR_SAMPLE_RATE_HZ / PPG_SAMPLE_AVERAGING
+MAX_SAMPLES = const(WINDOW_SECONDS * SENSOR_SAMPLE_RATE_HZ // PPG_SAMPLE_AVERAGING)
+MIN_SAMPLES = const(MIN_WINDOW_SECONDS * SENSOR_SAMPLE_RATE_HZ // PPG_SAMPLE_AVERAGING)
+
+# Heart-rate search range of the Goertzel scan (BPM)
+HR_MIN_BPM = const(40)
+HR_MAX_BPM = const(180)
+HR_STEP_BPM = const(2)
+_GOERTZEL_Q = const(12)    # Fixed-point bits of the Goertzel coefficients
+_HR_AMP_BITS = const(8)    # AC signal is scaled below 2^8 so the int32 state cannot overflow
+
+# HR signal-quality gate (heuristic, like the SpO2 checks)
+HR_MIN_IR_DC = const(5000)        # Lower IR level means no finger / poor contact
+HR_MIN_PERFUSION_INV = const(1000)  # IR peak-to-peak must be >= DC / 1000
+HR_MIN_PEAK_RATIO = const(8)      # Best candidate power vs. mean over all candidates;
+                                  # white noise peaks around 4-6, a clean pulse near 19
 
 # Register addresses (MAX30102)
-REG_INTR_STATUS_1 = 0x00
-REG_INTR_STATUS_2 = 0x01
-REG_INTR_ENABLE_1 = 0x02
-REG_INTR_ENABLE_2 = 0x03
+REG_INTR_STATUS_1 = const(0x00)
+REG_INTR_STATUS_2 = const(0x01)
+REG_INTR_ENABLE_1 = const(0x02)
+REG_INTR_ENABLE_2 = const(0x03)
+
+REG_FIFO_WR_PTR   = const(0x04)
+REG_OVF_COUNTER   = const(0x05)
+REG_FIFO_RD_PTR   = const(0x06)
+REG_FIFO_DATA     = const(0x07)
+REG_FIFO_CONFIG   = const(0x08)
+
+REG_MODE_CONFIG   = const(0x09)
+REG_SPO2_CONFIG   = const(0x0A)
 
-REG_FIFO_WR_PTR   = 0x04
-REG_OVF_COUNTER   = 0x05
-REG_FIFO_RD_PTR   = 0x06
-REG_FIFO_DATA     = 0x07
-REG_FIFO_CONFIG   = 0x08
+REG_LED1_PA       = const(0x0C)   # RED LED pulse amplitude
+REG_LED2_PA       = const(0x0D)   # IR LED pulse amplitude
 
-REG_MODE_CONFIG   = 0x09
-REG_SPO2_CONFIG   = 0x0A
+REG_TEMP_INT      = const(0x1F)
+REG_TEMP_FRAC     = const(0x20)
 
-REG_LED1_PA       = 0x0C   # RED LED pulse amplitude
-REG_LED2_PA       = 0x0D   # IR LED pulse amplitude
+REG_PART_ID       = const(0xFF)   # Should be 0x15 for MAX30102
 
-REG_TEMP_INT      = 0x1F
-REG_TEMP_FRAC     = 0x20
+_PPG_MASK         = const(0x03FFFF)  # FIFO samples are 18 bits wide
+FIFO_DEPTH        = const(32)        # Samples held by the FIFO
 
-REG_PART_ID       = 0xFF   # Should be 0x15 for MAX30102
+# Slots of the _parse_fifo() state array (viper takes at most 4 args)
+_FS_N = const(0)       # in: FIFO entries in the burst buffer
+_FS_HEAD = const(1)    # in/out: next write position in the windows
+
+# GPIO wired to the MAX30102 INT output (optional). None = poll the FIFO
+# every pass. The wiring guide suggests GPIO32, which the FSR uses here.
+MAX30102_INT_PIN = None
+
+# Set by the INT falling-edge ISR; a bytearray so the ISR does not allocate
+_ppg_irq_flag = bytearray(1)
+
+def _on_ppg_int(pin):
+    _ppg_irq_flag[0] = 1
+
+
+@micropython.viper
+def _parse_fifo(buf: ptr8, red_win: ptr32, ir_win: ptr32, st: ptr32) -> int:
+    """
+    Decode st[_FS_N] 6-byte FIFO samples (18-bit big-endian RED then IR)
+    from buf straight into the MAX_SAMPLES-long window rings at
+    st[_FS_HEAD], skipping all-zero (invalid) samples. Advances st[_FS_HEAD]
+    and returns the number of samples stored.
+    """
+    n = st[_FS_N]
+    head = st[_FS_HEAD]
+    count = 0
+    o = 0
+    for i in range(n):
+        red = ((buf[o] << 16) | (buf[o + 1] << 8) | buf[o + 2]) & _PPG_MASK
+        ir = ((buf[o + 3] << 16) | (buf[o + 4] << 8) | buf[o + 5]) & _PPG_MASK
+        o += 6
+        # Once the windows are full the head slot holds the oldest sample,
+        # so an invalid one must not even be stored there
+        if (red | ir) == 0:
+            continue
+        red_win[head] = red
+        ir_win[head] = ir
+        head += 1
+        if head == MAX_SAMPLES:
+            head = 0
+        count += 1
+    st[_FS_HEAD] = head
+    return count
+
+
+# --- Native window kernels for HR / SpO2 estimation (int32 arrays) ---
+
+# Slots of the _window_stats() output
+_ST_RED_SUM = const(0)
+_ST_IR_SUM = const(1)
+_ST_IR_MIN = const(2)
+_ST_IR_MAX = const(3)
+_ST_RED_MIN = const(4)
+_ST_RED_MAX = const(5)
+
+# Slots of the _win_ac() argument array (viper takes at most 4 args)
+_AC_HEAD = const(0)    # Next write position of the ring
+_AC_MEAN = const(1)    # DC level to subtract
+_AC_SHIFT = const(2)   # Right shift that scales the AC part
+
+@micropython.viper
+def _window_stats(red: ptr32, ir: ptr32, n: int, out: ptr32):
+    """
+    Sum, min and max of red[0:n] and ir[0:n] in one pass, written to
+    out[_ST_*]. Order does not matter, so the rings are read in place.
+    """
+    red_lo = red[0]
+    red_hi = red_lo
+    ir_lo = ir[0]
+    ir_hi = ir_lo
+    red_sum = 0
+    ir_sum = 0
+    for i in range(n):
+        r = red[i]
+        v = ir[i]
+        red_sum += r
+        ir_sum += v
+        if r < red_lo:
+            red_lo = r
+        if r > red_hi:
+            red_hi = r
+        if v < ir_lo:
+            ir_lo = v
+        if v > ir_hi:
+            ir_hi = v
+    out[_ST_RED_SUM] = red_sum
+    out[_ST_IR_SUM] = ir_sum
+    out[_ST_IR_MIN] = ir_lo
+    out[_ST_IR_MAX] = ir_hi
+    out[_ST_RED_MIN] = red_lo
+    out[_ST_RED_MAX] = red_hi
+
+
+@micropython.viper
+def _win_ac(ring: ptr32, args: ptr32, dst: ptr32, count: int):
+    """
+    Copy the count newest entries of a MAX_SAMPLES ring (next write at
+    args[_AC_HEAD]) into dst, oldest first, as
+    (value - args[_AC_MEAN]) >> args[_AC_SHIFT] (DC removal and scaling).
+    """
+    mean = args[_AC_MEAN]
+    shift = args[_AC_SHIFT]
+    j = args[_AC_HEAD] - count
+    if j < 0:
+        j += MAX_SAMPLES
+    for i in range(count):
+        dst[i] = (ring[j] - mean) >> shift
+        j += 1
+        if j == MAX_SAMPLES:
+            j = 0
+
+
+@micropython.viper
+def _goertzel(src: ptr32, n: int, coeff: int, out: ptr32):
+    """
+    Goertzel recursion over src[0:n] with coeff = 2*cos(w) in Q12.
+    out[0] = s[n-1], out[1] = s[n-2]; the caller computes the bin power.
+    """
+    s1 = 0
+    s2 = 0
+    for i in range(n):
+        s = src[i] + ((coeff * s1) >> _GOERTZEL_Q) - s2
+        s2 = s1
+        s1 = s
+    out[0] = s1
+    out[1] = s2
 
 
 class MAX30102:
     """
     MAX30102 driver with:
       - FIFO-based reading
-      - Internal downsampled window buffer
+      - Internal averaged-sample window buffer
       - Simple heart-rate estimation from IR channel
 
     Public methods:
       - get_latest_pair()  -> (red, ir) or (None, None)
+      - estimate_vitals() -> (hr_bpm, spo2), either may be None
       - estimate_hr_simple() -> hr_bpm (float) or None
+      - estimate_spo2_simple() -> spo2 (float) or None
     """
 
-    def __init__(self, i2c):
+    def __init__(self, i2c, int_pin=None):
         self.i2c = i2c
 
-        # --- Internal buffers for downsampled data (for HR / SpO2 estimation) ---
-        self.ir_window = []           # Downsampled IR samples
-        self.red_window = []          # Downsampled RED samples
-        self._downsample_counter = 0  # Counter for integer decimation
+        # --- Internal ring buffers for averaged samples (for HR / SpO2 estimation) ---
+        self.ir_window = array.array('i', [0] * MAX_SAMPLES)    # Averaged IR samples
+        self.red_window = array.array('i', [0] * MAX_SAMPLES)   # Averaged RED samples
+        self._win_head = 0            # Next write position in the windows
+        self._win_count = 0           # Valid samples in the windows (<= MAX_SAMPLES)
+
+        # --- Work buffers for the native estimation kernels ---
+        self._ac = array.array('i', [0] * MAX_SAMPLES)       # Time-ordered, scaled AC signal
+        self._stats = array.array('i', [0] * 6)              # RED / IR sum, min, max (_ST_*)
+        self._ac_args = array.array('i', [0] * 3)            # _AC_* slots for _win_ac
+        self._gz = array.array('i', [0, 0])                  # Goertzel state output
+        # Q12 Goertzel coefficients 2*cos(w), one per candidate heart rate
+        self._hr_coeffs = array.array('i', [
+            int(2.0 * math.cos(2.0 * math.pi * bpm / (60.0 * PPG_RATE_HZ)) * (1 << _GOERTZEL_Q))
+            for bpm in range(HR_MIN_BPM, HR_MAX_BPM + 1, HR_STEP_BPM)
+        ])
 
         # --- SpO2 estimation state ---
         self._last_spo2 = None       # Last smoothed SpO2 value
         self._spo2_alpha = 0.3       # EMA smoothing factor (0..1)
 
+        # --- Reused I2C buffers (no allocation per register access) ---
+        self._rx1 = bytearray(1)     # Single register read
+        self._rx2 = bytearray(2)     # INTR_STATUS_1..2
+        self._rx3 = bytearray(3)     # FIFO_WR_PTR..FIFO_RD_PTR
+        self._tx1 = bytearray(1)     # Single register write
+        self._fifo_buf = bytearray(6 * FIFO_DEPTH)        # Whole FIFO in one burst
+        self._fifo_mv = memoryview(self._fifo_buf)
+        self._fifo_state = array.array('i', [0, 0])        # _FS_* slots for _parse_fifo
+
         # --- Basic configuration and sanity check ---
         self._check_part_id()
         self._configure_sensor()
         self._clear_fifo_pointers()
 
+        # --- Optional interrupt-driven reads (INT is active low) ---
+        self._int_pin = None
+        if int_pin is not None:
+            self._int_pin = Pin(int_pin, Pin.IN, Pin.PULL_UP)
+            self._int_pin.irq(trigger=Pin.IRQ_FALLING, handler=_on_ppg_int)
+
 
     # -------------------------------------------------------------------------
     #  Low-level I2C helpers
     # -------------------------------------------------------------------------
     def _read_reg(self, reg, n_bytes=1):
-        """Read 1 or more bytes from a register."""
-        data = self.i2c.readfrom_mem(MAX30102_ADDR, reg, n_bytes)
+        """
+        Read 1 or more bytes from a register.
+        Single-byte reads use a reused buffer (no allocation).
+        """
         if n_bytes == 1:
-            return data[0]
+            self.i2c.readfrom_mem_into(MAX30102_ADDR, reg, self._rx1)
+            return self._rx1[0]
+        data = bytearray(n_bytes)
+        self.i2c.readfrom_mem_into(MAX30102_ADDR, reg, data)
         return data
 
     def _write_reg(self, reg, value):
         """Write 1 byte to a register."""
-        self.i2c.writeto_mem(MAX30102_ADDR, reg, bytes([value & 0xFF]))
+        self._tx1[0] = value & 0xFF
+        self.i2c.writeto_mem(MAX30102_ADDR, reg, self._tx1)
+
+    def _read_fifo_ptrs(self):
+        """
+        Read FIFO_WR_PTR, OVF_COUNTER and FIFO_RD_PTR (contiguous, 0x04..0x06)
+        in one 3-byte transaction. Returns (wr, ovf, rd).
+        """
+        ptrs = self._rx3
+        self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_FIFO_WR_PTR, ptrs)
+        return ptrs[0], ptrs[1], ptrs[2]
+
+    def _read_intr_status(self):
+        """
+        Read (and so clear) INTR_STATUS_1 and _2 in one 2-byte transaction.
+        Returns INTR_STATUS_1.
+        """
+        self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_INTR_STATUS_1, self._rx2)
+        return self._rx2[0]
 
     # -------------------------------------------------------------------------
     #  Sensor configuration
@@ -206,7 +477,7 @@ class MAX30102:
             raise Exception("Unexpected PART_ID for MAX30102: 0x%02X" % part_id)
 
     def _configure_sensor(self):
-        """Reset and configure MAX30102 for SpO2 mode with ~100Hz sample rate."""
+        """Reset and configure MAX30102 for SpO2 mode, 200Hz averaged down to 12.5Hz."""
         # 1. Soft reset
         self._write_reg(REG_MODE_CONFIG, 0x40)  # Reset bit
         time.sleep_ms(10)
@@ -219,11 +490,11 @@ class MAX30102:
             time.sleep_ms(1)
         # print("MODE_CONFIG after reset: 0x%02X" % mc)
 
-        # 3. FIFO configuration
-        self._write_reg(REG_FIFO_CONFIG, 0x4F)
+        # 3. FIFO configuration: SMP_AVE=16 (0b100), no rollover, A_FULL=15
+        self._write_reg(REG_FIFO_CONFIG, 0x8F)
 
-        # 4. SpO2 config (sample rate, pulse width, ADC range)
-        self._write_reg(REG_SPO2_CONFIG, 0x27)
+        # 4. SpO2 config: ADC range 4096nA, 200Hz sample rate, 411us pulse width
+        self._write_reg(REG_SPO2_CONFIG, 0x2B)
 
         # 5. LED pulse amplitudes
         self._write_reg(REG_LED1_PA, 0x24)  # Red LED
@@ -244,84 +515,85 @@ class MAX30102:
         self._write_reg(REG_FIFO_RD_PTR, 0x00)
 
         # Clear any pending interrupts
-        _ = self._read_reg(REG_INTR_STATUS_1)
-        _ = self._read_reg(REG_INTR_STATUS_2)
+        self._read_intr_status()
 
     # -------------------------------------------------------------------------
     #  FIFO reading and window management
     # -------------------------------------------------------------------------
     def _read_fifo_samples(self):
         """
-        Robust FIFO reading for buggy pointer chips.
-        - Uses Observer pattern: observe INT_STATUS1 to decide reads.
-        - Producer-Consumer: sensor produces samples, we consume until empty.
-        - Error handling: timeout, I2C exceptions, invalid data checks.
+        Read all pending FIFO samples in one I2C burst and decode them
+        straight into the RED/IR window rings at _win_head. Returns the
+        number of valid samples stored.
+        - The sample count comes from the FIFO write/read pointers (a
+          non-zero overflow counter means the FIFO is full).
+        - Buggy pointer chips: if the pointers report nothing but PPG_RDY
+          is set, a single sample is read instead.
+        - Error handling: I2C exceptions, invalid data checks.
         """
-        samples = []
-        max_reads = 32  # Max to prevent infinite loop (FIFO depth)
-        read_count = 0
-
         try:
-            while read_count < max_reads:
-                # Clear and check interrupt status
-                intr1 = self._read_reg(REG_INTR_STATUS_1)
-                _ = self._read_reg(REG_INTR_STATUS_2)
+            wr, ovf, rd = self._read_fifo_ptrs()
+            n = FIFO_DEPTH if ovf else (wr - rd) & (FIFO_DEPTH - 1)
 
-                # If no PPG_RDY, stop
+            if n == 0:
+                # Clear interrupt status; PPG_RDY set means pointers lied
+                intr1 = self._read_intr_status()
                 if (intr1 & 0x40) == 0:
-                    break
-
-                # Read 1 sample (6 bytes)
-                raw = self._read_reg(REG_FIFO_DATA, 6)
-
-                # Extract and validate
-                red = ((raw[0] << 16) | (raw[1] << 8) | raw[2]) & 0x03FFFF
-                ir = ((raw[3] << 16) | (raw[4] << 8) | raw[5]) & 0x03FFFF
-
-                # Basic validation: skip if data is zero/invalid
-                if red == 0 and ir == 0:
-                    continue
-
-                samples.append((red, ir))
-                read_count += 1
+                    return 0
+                n = 1
 
-                # Small delay to avoid I2C overload
-                time.sleep_ms(1)
+            # One burst; FIFO_DATA does not auto-increment, the FIFO advances
+            self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_FIFO_DATA, self._fifo_mv[:n * 6])
 
         except OSError as e:
             print("I2C error in FIFO read:", e)
-            return []  # Return empty on error
+            return 0  # Nothing on error
+
+        # Decode and validate (skip zero/invalid samples) natively
+        st = self._fifo_state
+        st[_FS_N] = n
+        st[_FS_HEAD] = self._win_head
+        count = _parse_fifo(self._fifo_buf, self.red_window, self.ir_window, st)
+        self._win_head = st[_FS_HEAD]
 
         # logging for production debugging
-        # if read_count > 0:
-        #     print("Read %d samples from FIFO" % read_count)
+        # if count:
+        #     print("Read %d samples from FIFO" % count)
 
-        return samples
+        return count
+
+    def _data_ready(self):
+        """
+        With an INT pin, report whether the sensor signalled new samples and
+        clear its interrupt status so INT can fire again. Without one, always
+        True (poll the FIFO).
+        """
+        if self._int_pin is None:
+            return True
+        # INT is active low and stays asserted until INTR_STATUS is read, so
+        # the level check also catches an interrupt that was already pending
+        # before the falling-edge handler was attached (no edge will follow)
+        if not _ppg_irq_flag[0] and self._int_pin.value():
+            return False
+        _ppg_irq_flag[0] = 0
+        try:
+            self._read_intr_status()
+        except OSError:
+            pass
+        return True
 
     def _update_window_from_sensor(self):
         """
-        Read all available FIFO samples, downsample them, and update the
-        internal RED/IR sliding windows.
+        Read all available FIFO samples (already averaged on-chip) and
+        update the internal RED/IR sliding windows.
         """
-        samples = self._read_fifo_samples()
-        if not samples:
+        if not self._data_ready():
             return
-
-        for red, ir in samples:
-            # Integer decimation: keep one sample every DOWNSAMPLE_FACTOR
-            self._downsample_counter += 1
-            if self._downsample_counter < DOWNSAMPLE_FACTOR:
-                continue
-            self._downsample_counter = 0
-
-            self.red_window.append(red)
-            self.ir_window.append(ir)
-
-            # Limit window length to MAX_SAMPLES
-            if len(self.ir_window) > MAX_SAMPLES:
-                # For small windows (e.g., 80 samples), pop(0) cost is acceptable
-                self.ir_window.pop(0)
-                self.red_window.pop(0)
+        # The samples land in the rings directly, overwriting the oldest
+        # ones once the windows are full
+        count = self._read_fifo_samples()
+        if count:
+            self._win_count = min(self._win_count + count, MAX_SAMPLES)
 
     # -------------------------------------------------------------------------
     #  Public data access
@@ -335,151 +607,152 @@ class MAX30102:
         # First, pull in all pending samples from sensor
         self._update_window_from_sensor()
 
-        if not self.ir_window:
+        if not self._win_count:
             return None, None
 
         # Keep API simple: always return (red, ir)
-        return self.red_window[-1], self.ir_window[-1]
+        last = (self._win_head - 1) % MAX_SAMPLES
+        return self.red_window[last], self.ir_window[last]
 
     # -------------------------------------------------------------------------
-    #  Simple heart rate estimation (from internal IR window)
+    #  Heart rate / SpO2 estimation (from internal windows)
     # -------------------------------------------------------------------------
-    @staticmethod
-    def _moving_average(signal, window):
-        """Simple moving average, padded to original length."""
-        n = len(signal)
-        if window <= 1 or n <= window:
-            return signal[:]
-        out = []
-        s = 0
-        for i in range(window):
-            s += signal[i]
-        out.append(s / window)
-        for i in range(window, n):
-            s += signal[i] - signal[i - window]
-            out.append(s / window)
-        pad_len = window - 1
-        return [out[0]] * pad_len + out
-
-    def estimate_hr_simple(self):
+    def _update_stats(self):
         """
-        Estimate heart rate (BPM) from the internal IR window.
-
-        Uses:
-          - SAMPLE_RATE_HZ as effective sampling rate on the window
-          - MIN_WINDOW_SECONDS and WINDOW_SECONDS for data length checks
-
-        :return: heart rate in BPM (float) or None if not enough / unreliable
+        Compute RED / IR window statistics into _stats in one pass.
+        Returns the number of samples covered, or 0 if the window holds
+        less than MIN_WINDOW_SECONDS of data.
         """
-        ir_buffer = self.ir_window
-        n = len(ir_buffer)
+        n = self._win_count
+        if n < MIN_SAMPLES:
+            return 0
+        _window_stats(self.red_window, self.ir_window, n, self._stats)
+        return n
 
-        # Require at least MIN_WINDOW_SECONDS worth of data
-        min_samples = int(SAMPLE_RATE_HZ * MIN_WINDOW_SECONDS)
-        if n < min_samples:
-            return None
+    def estimate_vitals(self):
+        """
+        Estimate heart rate and SpO2 from a single statistics pass over the
+        windows. Use this instead of calling both estimate_* methods.
 
-        # Use only last WINDOW_SECONDS of data
-        if n > MAX_SAMPLES:
-            data = ir_buffer[-MAX_SAMPLES:]
-        else:
-            data = ir_buffer[:]
+        :return: (hr_bpm, spo2); either is None if not enough / unreliable
+        """
+        n = self._update_stats()
+        if not n:
+            return None, None
+        return self._hr_from_stats(n), self._spo2_from_stats(n)
 
-        if not data:
-            return None
+    def estimate_hr_simple(self):
+        """Estimate heart rate (BPM) from the internal IR window, or None."""
+        n = self._update_stats()
+        return self._hr_from_stats(n) if n else None
 
-        # 1) Remove DC component
-        mean_val = sum(data) / len(data)
-        ac = [x - mean_val for x in data]
+    def estimate_spo2_simple(self):
+        """Estimate smoothed SpO2 (%) from the internal RED/IR windows, or None."""
+        n = self._update_stats()
+        return self._spo2_from_stats(n) if n else None
 
-        # 2) Smooth with a small moving average window
-        smoothed = MAX30102._moving_average(ac, 5)
+    def _hr_from_stats(self, n):
+        """
+        Estimate heart rate (BPM) from the internal IR window.
 
-        # 3) Peak detection
-        max_val = max(smoothed)
-        if max_val <= 0:
-            return None
+        Scans HR_MIN_BPM..HR_MAX_BPM in HR_STEP_BPM steps with a Goertzel
+        filter and returns the frequency with the most power, refined by
+        parabolic interpolation between neighbouring candidates. Unlike
+        peak picking this is not thrown off by a single motion spike and
+        takes the same time for every window.
 
-        threshold = 0.3 * max_val  # 30% of peak amplitude
-        # Minimal distance between peaks (in samples), assuming max HR ~200 bpm
-        min_distance = int(0.3 * SAMPLE_RATE_HZ)  # 0.3 s
+        Uses:
+          - PPG_RATE_HZ as effective sampling rate on the window
+          - MIN_WINDOW_SECONDS and WINDOW_SECONDS for data length checks
 
-        peaks = []
-        last_peak = -min_distance
+        The window is rejected (None) without a usable pulse: IR level below
+        HR_MIN_IR_DC (no finger), peak-to-peak below 1/HR_MIN_PERFUSION_INV
+        of the DC level, or no candidate standing HR_MIN_PEAK_RATIO times
+        above the mean power of the scan (noise / drift only).
 
-        # Simple local maxima detection
-        for i in range(1, len(smoothed) - 1):
-            if (smoothed[i] > threshold and
-                smoothed[i] > smoothed[i - 1] and
-                smoothed[i] > smoothed[i + 1]):
-                if i - last_peak >= min_distance:
-                    peaks.append(i)
-                    last_peak = i
+        Expects _stats to hold the current window statistics (_update_stats).
 
-        if len(peaks) < 2:
+        :return: heart rate in BPM (float) or None if unreliable
+        """
+        # 1) Remove the DC component and scale the AC part below 2^_HR_AMP_BITS,
+        #    copying the last WINDOW_SECONDS out of the ring in time order
+        stats = self._stats
+        mean = stats[_ST_IR_SUM] // n
+        if mean < HR_MIN_IR_DC:
             return None
-
-        # 4) Compute RR intervals and HR
-        intervals = []
-        for i in range(1, len(peaks)):
-            dt_samples = peaks[i] - peaks[i - 1]
-            if dt_samples <= 0:
-                continue
-            rr = dt_samples / float(SAMPLE_RATE_HZ)
-            intervals.append(rr)
-
-        if not intervals:
+        if (stats[_ST_IR_MAX] - stats[_ST_IR_MIN]) * HR_MIN_PERFUSION_INV < mean:
             return None
-
-        rr_mean = sum(intervals) / len(intervals)
-        if rr_mean <= 0:
+        amp = max(stats[_ST_IR_MAX] - mean, mean - stats[_ST_IR_MIN])
+        if amp <= 0:
             return None
+        shift = 0
+        while (amp >> shift) >= (1 << _HR_AMP_BITS):
+            shift += 1
+        args = self._ac_args
+        args[_AC_HEAD] = self._win_head
+        args[_AC_MEAN] = mean
+        args[_AC_SHIFT] = shift
+        ac = self._ac
+        _win_ac(self.ir_window, args, ac, n)
+
+        # 2) Goertzel power for every candidate heart rate
+        coeffs = self._hr_coeffs
+        gz = self._gz
+        #    The strongest candidate and its two neighbours are tracked as
+        #    the scan goes, so no list of powers is built
+        best = -1
+        p1 = 0            # Power of the best candidate so far
+        p0 = None         # ... of the candidate before it
+        p2 = None         # ... and after it
+        prev = None
+        total = 0         # Sum of all powers, for the peak-to-average check
+        i = 0
+        for coeff in coeffs:
+            _goertzel(ac, n, coeff, gz)
+            s1 = gz[0]
+            s2 = gz[1]
+            p = s1 * s1 + s2 * s2 - ((coeff * s1 * s2) >> _GOERTZEL_Q)
+            total += p
+            if p > p1:
+                best = i
+                p0 = prev
+                p1 = p
+                p2 = None
+            elif i == best + 1:
+                p2 = p
+            prev = p
+            i += 1
+        if best < 0 or p1 * i < HR_MIN_PEAK_RATIO * total:
+            return None
+
+        # 3) Parabolic interpolation between the neighbouring candidates
+        offset = 0.0
+        if p0 is not None and p2 is not None:
+            denom = p0 - 2 * p1 + p2
+            if denom != 0:
+                offset = 0.5 * (p0 - p2) / denom
 
-        hr_bpm = 60.0 / rr_mean
+        hr_bpm = HR_MIN_BPM + (best + offset) * HR_STEP_BPM
         return hr_bpm
 
-    def estimate_spo2_simple(self):
+    def _spo2_from_stats(self, n):
         """
         SpO2 estimation using ratio-of-ratios on RED/IR windows, with
         basic signal-quality checks and simple exponential smoothing.
+        Expects _stats to hold the current window statistics (_update_stats).
 
         Returns:
             Smoothed SpO2 percentage (float) or None if data is unreliable.
         """
-        red_buffer = self.red_window
-        ir_buffer = self.ir_window
-
-        # -------------------------------
-        # 0) Check minimal data length
-        # -------------------------------
-        try:
-            min_seconds = max(4.0, MIN_WINDOW_SECONDS)  # Prefer at least ~4s for SpO2
-            min_samples = int(SAMPLE_RATE_HZ * min_seconds)
-        except NameError:
-            # Fallback if constants are not defined
-            min_samples = 80  # e.g., ~3–4s at 20–30 Hz effective rate
-
-        n = min(len(red_buffer), len(ir_buffer))
-        if n < min_samples:
-            return None
-
-        # Use up to MAX_SAMPLES most recent data if defined, otherwise use all
-        try:
-            window_len = min(n, MAX_SAMPLES)
-        except NameError:
-            window_len = n
-
-        red_data = red_buffer[-window_len:]
-        ir_data = ir_buffer[-window_len:]
-
-        if not red_data or not ir_data:
-            return None
-
         # -------------------------------
         # 1) DC components (mean values)
+        # 2) AC components (peak-to-peak)
         # -------------------------------
-        red_dc = sum(red_data) / len(red_data)
-        ir_dc = sum(ir_data) / len(ir_data)
+        stats = self._stats
+        red_dc = stats[_ST_RED_SUM] / n
+        red_ac = stats[_ST_RED_MAX] - stats[_ST_RED_MIN]
+        ir_dc = stats[_ST_IR_SUM] / n
+        ir_ac = stats[_ST_IR_MAX] - stats[_ST_IR_MIN]
 
         # DC level sanity checks
         # Threshold values are heuristic and may need tuning for your hardware.
@@ -487,15 +760,6 @@ class MAX30102:
             # Very low DC suggests poor contact or no finger
             return None
 
-        # -------------------------------
-        # 2) AC components (peak-to-peak)
-        # -------------------------------
-        red_ac_signal = [x - red_dc for x in red_data]
-        ir_ac_signal = [x - ir_dc for x in ir_data]
-
-        red_ac = max(red_ac_signal) - min(red_ac_signal)
-        ir_ac = max(ir_ac_signal) - min(ir_ac_signal)
-
         # AC must be clearly above noise; thresholds are rough heuristics.
         if red_ac <= 0 or ir_ac <= 0:
             return None
@@ -554,10 +818,31 @@ class MAX30102:
 #    3-axis accelerometer
 ##################################################
 
-ADXL345_ADDR = 0x53
+ADXL345_ADDR = const(0x53)
+
+# Activity detection registers
+ADXL345_REG_THRESH_ACT = const(0x24)
+ADXL345_REG_ACT_INACT_CTL = const(0x27)
+ADXL345_REG_INT_ENABLE = const(0x2E)
+ADXL345_REG_INT_MAP = const(0x2F)
+ADXL345_REG_INT_SOURCE = const(0x30)
+
+# Activity threshold, 62.5 mg/LSB (0x04 = 250 mg, AC-coupled)
+ADXL345_ACT_THRESHOLD = const(0x04)
+
+# GPIO wired to the ADXL345 INT1 output (optional). None = read X/Y/Z
+# every pass; with a pin, only passes after detected motion read the axes.
+ADXL345_INT_PIN = None
+
+# Set by the INT1 rising-edge ISR; a bytearray so the ISR does not allocate
+_acc_irq_flag = bytearray(1)
+
+def _on_acc_int(pin):
+    _acc_irq_flag[0] = 1
+
 
 class ADXL345:
-    def __init__(self, i2c):
+    def __init__(self, i2c, int_pin=None):
         self.i2c = i2c
 
         # Set to measurement mode
@@ -566,13 +851,52 @@ class ADXL345:
         # Full resolution ±2g
         self.i2c.writeto_mem(ADXL345_ADDR, 0x31, bytes([0x08]))
 
+        # Reused receive buffer for the 6 data registers (0x32..0x37)
+        self._buf6 = bytearray(6)
+        self._rx1 = bytearray(1)
+
+        # Last reading, reported again while no motion is detected
+        self.last_xyz = (0, 0, 0)
+
+        # --- Optional activity interrupt (INT1, active high, latched) ---
+        self._int_pin = None
+        if int_pin is not None:
+            self.i2c.writeto_mem(ADXL345_ADDR, ADXL345_REG_THRESH_ACT,
+                                 bytes([ADXL345_ACT_THRESHOLD]))
+            # AC-coupled activity on X, Y and Z
+            self.i2c.writeto_mem(ADXL345_ADDR, ADXL345_REG_ACT_INACT_CTL, b'\xf0')
+            # All interrupts to INT1, then enable activity only
+            self.i2c.writeto_mem(ADXL345_ADDR, ADXL345_REG_INT_MAP, b'\x00')
+            self.i2c.writeto_mem(ADXL345_ADDR, ADXL345_REG_INT_ENABLE, b'\x10')
+            self._int_pin = Pin(int_pin, Pin.IN)
+            self._int_pin.irq(trigger=Pin.IRQ_RISING, handler=_on_acc_int)
+            # First pass reads the axes once so last_xyz holds gravity
+            _acc_irq_flag[0] = 1
+
+    def motion_pending(self):
+        """
+        True if the axes should be read this pass: always without an INT
+        pin, otherwise only after the activity interrupt fired. No I2C
+        traffic, so the caller can skip the channel switch as well.
+        """
+        if self._int_pin is None:
+            return True
+        # The activity INT stays high until INT_SOURCE is read, so the level
+        # check also catches one latched before the rising-edge handler was
+        # attached (no edge will follow)
+        return bool(_acc_irq_flag[0]) or bool(self._int_pin.value())
+
     def read_xyz(self):
         """读取 X/Y/Z 三轴加速度 (signed 16-bit)
            Read X/Y/Z acceleration values
         """
-        data = self.i2c.readfrom_mem(ADXL345_ADDR, 0x32, 6)
-        x, y, z = ustruct.unpack("<hhh", data)
-        return x, y, z
+        if self._int_pin is not None:
+            # Reading INT_SOURCE releases the latched activity interrupt
+            _acc_irq_flag[0] = 0
+            self.i2c.readfrom_mem_into(ADXL345_ADDR, ADXL345_REG_INT_SOURCE, self._rx1)
+        self.i2c.readfrom_mem_into(ADXL345_ADDR, 0x32, self._buf6)
+        self.last_xyz = ustruct.unpack("<hhh", self._buf6)
+        return self.last_xyz
 
 
 ##################################################
@@ -585,8 +909,18 @@ fsr_pin = ADC(Pin(32))
 fsr_pin.atten(ADC.ATTN_11DB)      # enable 0–3.3V
 fsr_pin.width(ADC.WIDTH_12BIT)    # 12-bit precision
 
+# Samples averaged per FSR reading (power of two so the mean is a shift);
+# 16 conversions take well under 1 ms and smooth out ADC noise
+FSR_OVERSAMPLE_SHIFT = const(4)
+FSR_OVERSAMPLE = const(1 << FSR_OVERSAMPLE_SHIFT)
+
 def read_fsr():
-    return fsr_pin.read()
+    """Mean of FSR_OVERSAMPLE ADC conversions (same 0..4095 range as one read)."""
+    read = fsr_pin.read
+    total = 0
+    for _ in range(FSR_OVERSAMPLE):
+        total += read()
+    return total >> FSR_OVERSAMPLE_SHIFT
 
 
 ##################################################
@@ -595,7 +929,12 @@ def read_fsr():
 #    Setup main I2C bus
 ##################################################
 
-i2c = I2C(0, scl=Pin(20), sda=Pin(22), freq=400000)
+# Every device on this bus (TCA9548A, HDC1080, MAX30102, ADXL345) is rated
+# for Fast-mode only, so 400 kHz is the ceiling; Fast-mode Plus (1 MHz) would
+# be out of spec for all of them.
+I2C_FREQ_HZ = const(400000)
+
+i2c = I2C(0, scl=Pin(20), sda=Pin(22), freq=I2C_FREQ_HZ)
 
 
 ##################################################
@@ -605,13 +944,13 @@ i2c = I2C(0, scl=Pin(20), sda=Pin(22), freq=400000)
 ##################################################
 
 tca_select(i2c, 0)
-sensor_ppg = MAX30102(i2c)
+sensor_ppg = MAX30102(i2c, MAX30102_INT_PIN)
 
 tca_select(i2c, 1)
 sensor_hdc = HDC1080(i2c)
 
 tca_select(i2c, 2)
-sensor_acc = ADXL345(i2c)
+sensor_acc = ADXL345(i2c, ADXL345_INT_PIN)
 
 ##################################################
 # 7.5 NETWORK & BATCH CONFIG
@@ -625,6 +964,8 @@ def connect_wifi():
     """Connect ESP32 to WiFi."""
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
+    # Modem sleep between DTIM beacons, so the radio idles with the CPU
+    wlan.config(pm=wlan.PM_POWERSAVE)
     if not wlan.isconnected():
         wlan.connect(WIFI_SSID, WIFI_PASS)
         while not wlan.isconnected():
@@ -641,139 +982,346 @@ SERVER_PORT = 9999
 DEVICE_ID = "esp32_001"  # Modify as needed
 
 BASE_URL = "http://%s:%d" % (SERVER_IP, SERVER_PORT)
-VITALS_API_URL = BASE_URL + "/api/vitals"
+VITALS_API_PATH = "/api/vitals"
+VITALS_API_URL = BASE_URL + VITALS_API_PATH
 
 # Batch configuration
-BATCH_SIZE = 20  # <<< adjustable batch size
+BATCH_SIZE = const(20)  # <<< adjustable batch size
+
+# Estimate HR / SpO2 on the ESP32. Every point already carries the raw IR /
+# red counts, and the server derives HR from them, so this can be turned off
+# to save the per-pass window work; heartrate / spo2 are then sent as 0.
+VITALS_ON_DEVICE = True
+
+
+# Fixed binary layout of one buffered sample (36 bytes):
+#   cycle, timestamp, ir, red          -> uint32
+#   heartrate, spo2                    -> float32
+#   temperature_raw, humidity_raw      -> uint16 (HDC1080 codes)
+#   force                              -> uint16
+#   ax, ay, az                         -> int16
+RECORD_FMT = "<IIIIffHHHhhh"
+RECORD_SIZE = ustruct.calcsize(RECORD_FMT)
+
+# Batches are sent column-wise ("columnar-v3"): one JSON array per channel,
+# so each key appears once per batch instead of once per point. Integer
+# columns (including the raw HDC1080 codes) hold the first value followed
+# by differences to the previous one.
+BATCH_HEAD_TEMPLATE = ('{"device_id":"%s","batch_info":{"start_cycle":%d,'
+                       '"end_cycle":%d,"total_points":%d,"encoding":"columnar-v3"},"data":{')
+BATCH_TAIL = b'}}'
+
+# Column value encodings
+_COL_ABS = const(0)     # absolute value
+_COL_DIFF = const(1)    # difference to previous value
+_COL_TICKS = const(2)   # ticks_diff to previous value (wrapping ms ticks)
+
+# (JSON key, ustruct code, byte offset in RECORD_FMT, value format, encoding)
+BATCH_COLUMNS = (
+    ("cycle",           "<I", 0,  "%d",   _COL_DIFF),
+    ("timestamp",       "<I", 4,  "%d",   _COL_TICKS),
+    ("ir",              "<I", 8,  "%d",   _COL_DIFF),
+    ("red",             "<I", 12, "%d",   _COL_DIFF),
+    ("heartrate",       "<f", 16, "%.1f", _COL_ABS),
+    ("spo2",            "<f", 20, "%.1f", _COL_ABS),
+    ("temperature_raw", "<H", 24, "%d",   _COL_DIFF),
+    ("humidity_raw",    "<H", 26, "%d",   _COL_DIFF),
+    ("force",           "<H", 28, "%d",   _COL_DIFF),
+    ("ax",              "<h", 30, "%d",   _COL_DIFF),
+    ("ay",              "<h", 32, "%d",   _COL_DIFF),
+    ("az",              "<h", 34, "%d",   _COL_DIFF),
+)
 
 
 class VitalBatchSender:
     """
     Simple safe batch sender for ESP32 + MicroPython.
 
+    Samples are packed with ustruct.pack_into into one preallocated
+    bytearray used as a ring of fixed-size records, so buffering a point
+    allocates nothing. Records are only expanded when a batch is sent.
+
+    Sending happens in the run() coroutine, so the sampling task keeps
+    reading sensors while a batch is in flight.
+
     Features:
       - Size-based batching (batch_size)
       - Hard limit on buffer length (max_buffer_points) to avoid OOM
       - Optional time-based flush (flush_interval_ms)
+      - One persistent HTTP/1.1 keep-alive connection reused across batches
+      - Exponential backoff between failed batches (retry_backoff_ms .. max_backoff_ms)
     """
 
     def __init__(self,
                  device_id,
-                 url,
+                 host,
+                 port,
+                 path,
                  batch_size=20,
                  max_buffer_points=200,
-                 flush_interval_ms=5000):
+                 flush_interval_ms=5000,
+                 send_retries=2,
+                 retry_backoff_ms=1000,
+                 max_backoff_ms=60000):
         """
         :param device_id: Unique device ID string
-        :param url: HTTP endpoint for POST
+        :param host: Server IP address
+        :param port: Server TCP port
+        :param path: HTTP path for POST (e.g. /api/vitals)
         :param batch_size: Number of points per batch
         :param max_buffer_points: Max points kept in memory
         :param flush_interval_ms: Force flush if no send for this duration
+        :param send_retries: Reconnect-and-retry attempts per batch
+        :param retry_backoff_ms: Pause after the first failed batch, doubled per failure
+        :param max_backoff_ms: Upper bound for the pause between failed batches
         """
         self.device_id = device_id
-        self.url = url
+        self.host = host
+        self.port = port
+        self.path = path
         self.batch_size = batch_size
         self.max_buffer_points = max_buffer_points
         self.flush_interval_ms = flush_interval_ms
-
-        self.buffer = []
+        self.send_retries = send_retries
+        self.retry_backoff_ms = retry_backoff_ms
+        self.max_backoff_ms = max_backoff_ms
+
+        # Persistent connection streams, opened lazily and reopened after errors
+        self._reader = None
+        self._writer = None
+
+        # Request header is fixed except for Content-Length: format it once
+        self._header_prefix = ("POST %s HTTP/1.1\r\n"
+                               "Host: %s:%d\r\n"
+                               "Content-Type: application/json\r\n"
+                               "Connection: keep-alive\r\n"
+                               "Content-Length: " % (path, host, port)).encode()
+
+        # Record ring buffer: oldest record at _head, _count records stored
+        self._records = bytearray(RECORD_SIZE * max_buffer_points)
+        self._head = 0
+        self._count = 0
+        self._inflight = 0           # Oldest records currently being sent
+        self._batch_ready = asyncio.Event()
         self.last_send_ms = time.ticks_ms()
+        self._backoff_ms = 0         # Current pause after a failed batch (0 = healthy)
 
-    def add_point(self, point, now_ms=None):
+    def add_point(self, cycle, timestamp, ir, red, heartrate, spo2,
+                  temperature, humidity, force, ax, ay, az):
         """
-        Add one data point to buffer, and send if batch is ready.
+        Pack one data point into the buffer, and wake the sender if a batch
+        is ready. temperature and humidity are the raw HDC1080 codes.
         """
-        if now_ms is None:
-            now_ms = time.ticks_ms()
-
-        self.buffer.append(point)
-
-        # Enforce hard buffer limit (keep newest points)
-        if len(self.buffer) > self.max_buffer_points:
-            # Drop oldest points
-            drop_count = len(self.buffer) - self.max_buffer_points
-            self.buffer = self.buffer[drop_count:]
+        # Enforce hard buffer limit (keep newest points): drop the oldest
+        if self._count == self.max_buffer_points:
+            self._head = (self._head + 1) % self.max_buffer_points
+            self._count -= 1
+            if self._inflight:
+                # Already formatted into the batch in flight
+                self._inflight -= 1
+
+        slot = (self._head + self._count) % self.max_buffer_points
+        ustruct.pack_into(RECORD_FMT, self._records, slot * RECORD_SIZE,
+                          cycle, timestamp, ir, red, heartrate, spo2,
+                          temperature, humidity, force, ax, ay, az)
+        self._count += 1
 
         # Size-based send
-        if len(self.buffer) >= self.batch_size:
-            self._send_buffer(now_ms)
+        if self._count - self._inflight >= self.batch_size:
+            self._batch_ready.set()
 
-    def flush_if_due(self, now_ms=None):
+    def flush_if_due(self, now_ms):
         """
         Time-based flush: if there are unsent points and last send
-        was a while ago, send them.
+        was a while ago, wake the sender. Called by the sampling loop with
+        the tick it already read, so the sender never polls the clock.
         """
-        if now_ms is None:
-            now_ms = time.ticks_ms()
-
-        if not self.buffer:
+        if self._count <= self._inflight:
             return
 
         if time.ticks_diff(now_ms, self.last_send_ms) >= self.flush_interval_ms:
-            self._send_buffer(now_ms)
+            self._batch_ready.set()
+
+    def _field(self, index, code, offset):
+        """Unpack one field of the index-th oldest buffered record."""
+        slot = (self._head + index) % self.max_buffer_points
+        return ustruct.unpack_from(code, self._records, slot * RECORD_SIZE + offset)[0]
+
+    def _column(self, total_points, code, offset, fmt, encoding):
+        """Format one channel of the first total_points records as a JSON array."""
+        values = []
+        prev = 0
+        for i in range(total_points):
+            value = self._field(i, code, offset)
+            if i == 0 or encoding == _COL_ABS:
+                values.append(fmt % value)
+            elif encoding == _COL_TICKS:
+                values.append(fmt % time.ticks_diff(value, prev))
+            else:
+                values.append(fmt % (value - prev))
+            prev = value
+        return ",".join(values)
+
+    def _body_parts(self, total_points):
+        """
+        Yield the JSON body for the first total_points records as small
+        encoded parts: batch header, one part per column and the closing
+        braces.
+        """
+        yield (BATCH_HEAD_TEMPLATE % (self.device_id, self._field(0, "<I", 0),
+                                      self._field(total_points - 1, "<I", 0),
+                                      total_points)).encode()
+        sep = ""
+        for key, code, offset, fmt, encoding in BATCH_COLUMNS:
+            yield ('%s"%s":[%s]' % (sep, key, self._column(total_points, code, offset,
+                                                          fmt, encoding))).encode()
+            sep = ","
+        yield BATCH_TAIL
 
-    def _send_buffer(self, now_ms):
+    # -------------------------------------------------------------------------
+    #  Persistent HTTP connection
+    # -------------------------------------------------------------------------
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def _close(self):
+        writer = self._writer
+        self._reader = self._writer = None
+        if writer is not None:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _post_once(self, parts, content_length):
+        """
+        POST the body parts on the open connection and return the HTTP
+        status code. The parts are written one by one, so no contiguous
+        copy of the whole JSON batch is made. The response body is
+        drained so the connection can be reused.
+        """
+        reader = self._reader
+        writer = self._writer
+        writer.write(self._header_prefix)
+        writer.write(("%d\r\n\r\n" % content_length).encode())
+        for part in parts:
+            writer.write(part)
+            await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise OSError("connection closed by server")
+        status = int(status_line.split(None, 2)[1])
+
+        content_length = 0
+        keep_alive = True
+        while True:
+            line = await reader.readline()
+            if not line or line == b"\r\n":
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                content_length = int(value)
+            elif name == b"connection" and value.strip().lower() == b"close":
+                keep_alive = False
+
+        while content_length > 0:
+            chunk = await reader.read(min(content_length, 256))
+            if not chunk:
+                break
+            content_length -= len(chunk)
+
+        if not keep_alive:
+            await self._close()
+        return status
+
+    async def _post(self, parts, content_length):
+        """POST with reconnect: a stale keep-alive socket is reopened and retried."""
+        for attempt in range(self.send_retries + 1):
+            try:
+                if self._writer is None:
+                    await self._connect()
+                # Shorter timeout helps avoid long blocking
+                return await asyncio.wait_for_ms(self._post_once(parts, content_length), 5000)
+            except (OSError, asyncio.TimeoutError):
+                await self._close()
+                if attempt == self.send_retries:
+                    raise
+
+    async def _send_buffer(self):
         """
         Internal: send current buffer as one HTTP POST batch.
+
+        Channels are sent as columns (see BATCH_COLUMNS); the server
+        rebuilds the per-point data.
+        Points added while the request is in flight stay buffered.
         """
-        if not self.buffer:
+        total_points = self._count
+        if not total_points:
             return
+        self._inflight = total_points
 
-        start_cycle = self.buffer[0]["cycle"]
-        end_cycle = self.buffer[-1]["cycle"]
-        total_points = len(self.buffer)
-
-        payload = {
-            "device_id": self.device_id,
-            "batch_info": {
-                "start_cycle": start_cycle,
-                "end_cycle": end_cycle,
-                "total_points": total_points
-            },
-            "data": self.buffer
-        }
+        # Format the body once; retries resend the same parts
+        parts = list(self._body_parts(total_points))
+        content_length = 0
+        for part in parts:
+            content_length += len(part)
 
         try:
-            # Shorter timeout helps avoid long blocking
-            resp = urequests.post(self.url, json=payload, timeout=5)
-            status = resp.status_code
-            resp.close()
+            status = await self._post(parts, content_length)
             print("Batch sent. Status:", status)
 
-            # Clear buffer on success
-            self.buffer = []
-            self.last_send_ms = now_ms
+            # Release the sent records still in the buffer on success
+            self._head = (self._head + self._inflight) % self.max_buffer_points
+            self._count -= self._inflight
+            self.last_send_ms = time.ticks_ms()
+            self._backoff_ms = 0
 
         except Exception as e:
-            # Do not clear buffer; keep latest points but enforce max_buffer_points
+            # Do not clear buffer; the ring already keeps at most
+            # max_buffer_points of the newest samples
             print("ERROR: Failed to send batch:", e)
-
-            if len(self.buffer) > self.max_buffer_points:
-                # Keep only the newest points
-                self.buffer = self.buffer[-self.max_buffer_points:]
+            if self._backoff_ms:
+                self._backoff_ms = min(self._backoff_ms * 2, self.max_backoff_ms)
+            else:
+                self._backoff_ms = self.retry_backoff_ms
 
         finally:
-            # Help GC to reclaim memory
-            gc.collect()
+            self._inflight = 0
 
-class CycleCounter:
-    """
-    Monotonic cycle counter with wrap-around at a configurable maximum value.
-    """
-
-    def __init__(self, max_value=1000000000):
-        self.max_value = max_value
-        self.value = 0
-
-    def next(self):
+    async def run(self):
         """
-        Increment counter and return the next cycle value.
-        Wraps back to 1 after reaching max_value.
+        Sender task: wait until add_point() (full batch) or flush_if_due()
+        (overdue partial batch) wakes it, then send the buffer.
         """
-        self.value += 1
-        if self.value > self.max_value:
-            self.value = 1
-        return self.value
+        # Open the connection up front so the first batch does not pay for
+        # TCP setup; if the server is down, _post() connects on demand
+        try:
+            await self._connect()
+        except OSError as e:
+            print("WARN: Initial server connection failed:", e)
+        while True:
+            await self._batch_ready.wait()
+            self._batch_ready.clear()
+            if self._count:
+                await self._send_buffer()
+                if self._backoff_ms:
+                    # Server unreachable: back off instead of retrying on every point
+                    await asyncio.sleep_ms(self._backoff_ms)
+
+
+# Cycle numbers run 1.._CYCLE_MASK + 1 and wrap back to 1 (power of two,
+# so the wrap is a single AND instead of a compare and branch)
+_CYCLE_MASK = const(0x3FFFFFFF)
+
+# Number of the last stored sample
+_cycle = 0
+
+# Temperature/humidity change slowly: refresh them once per second only
+HDC_PERIOD_PASSES = const(SAMPLE_RATE_HZ)
+_hdc_countdown = 0
 
 
 ##################################################
@@ -782,67 +1330,115 @@ class CycleCounter:
 
 print("Start continuous streaming")
 
-last_send = time.ticks_ms()
+@micropython.native
+def _sample_once(i2c, ppg, hdc, acc, sender, now_ms):
+    """
+    One pass of the streaming loop, compiled to native code: read all
+    sensors and store one data point timestamped now_ms.
+    """
+    global _cycle, _tca_current, _hdc_countdown
+
+    # Mux channel switches are inlined (same logic as tca_select) to keep
+    # function calls out of the loop. Each channel is visited once per pass.
+
+    # HDC1080 — CH1, every HDC_PERIOD_PASSES passes: collect the conversion
+    # started last time, then start the next one; it runs in the background
+    if _hdc_countdown == 0:
+        _hdc_countdown = HDC_PERIOD_PASSES
+        if _tca_current != 1:
+            _tca_current = -1   # stays unknown if the write raises
+            i2c.writeto(TCA_ADDR, _TCA_SEL1)
+            _tca_current = 1
+        hdc.collect()
+        hdc.start_conversion()
+    _hdc_countdown -= 1
+    temp_raw = hdc.temp_raw
+    humi_raw = hdc.humi_raw
+
+    # MAX30102 — CH0
+    if _tca_current != 0:
+        _tca_current = -1
+        i2c.writeto(TCA_ADDR, _TCA_SEL0)
+        _tca_current = 0
+    red, ir = ppg.get_latest_pair()
+    if VITALS_ON_DEVICE:
+        heartrate, spo2 = ppg.estimate_vitals()
+    else:
+        heartrate = spo2 = None
+
+    # ADXL345 — CH2, skipped (channel switch included) while nothing moves
+    if acc.motion_pending():
+        if _tca_current != 2:
+            _tca_current = -1
+            i2c.writeto(TCA_ADDR, _TCA_SEL2)
+            _tca_current = 2
+        ax, ay, az = acc.read_xyz()
+    else:
+        ax, ay, az = acc.last_xyz
+
+    # FSR402 (ADC)
+    fsr_raw = read_fsr()
 
-batch_sender = VitalBatchSender(DEVICE_ID, VITALS_API_URL, BATCH_SIZE)
+    force_value = fsr_raw
 
-cycle_counter = CycleCounter()
+    _cycle = (_cycle & _CYCLE_MASK) + 1
+    cycle = _cycle
 
-while True:
+    # Debug if needed
+    # print(cycle, now_ms, ir, red, heartrate, spo2)
+
+    sender.add_point(
+        cycle, now_ms,
+        0 if ir is None else ir,
+        0 if red is None else red,
+        0 if heartrate is None else heartrate,
+        0 if spo2 is None else spo2,
+        0 if temp_raw is None else temp_raw,
+        0 if humi_raw is None else humi_raw,
+        force_value,
+        ax, ay, az
+    )
+    sender.flush_if_due(now_ms)
+    # if cycle % 10 == 0:
+    #     print("cycle:", cycle, "hr:", heartrate, "spo2:", spo2)
 
-    # MAX30102 — CH0
-    tca_select(i2c, 0)
-    red, ir = sensor_ppg.get_latest_pair()
-    heartrate = sensor_ppg.estimate_hr_simple()
-    spo2 = sensor_ppg.estimate_spo2_simple()
 
-    # HDC1080 — CH1
+async def sample_task(sender):
+    """
+    Sampling task: one sensor pass every SLEEP_MS on a fixed schedule.
+    The gap until the next pass is awaited, so the sender task runs in it.
+    The SLEEP_MS gaps are far too short for lightsleep to pay off: it would
+    stall the event loop and let the keep-alive socket and WiFi timers go
+    stale, so the CPU idles in the scheduler and the radio in PM_POWERSAVE
+    modem sleep instead.
+    """
+    # Start the first HDC1080 conversion so the first pass has a result
     tca_select(i2c, 1)
-    temp_c = sensor_hdc.read_temp_c()
-    humidity = sensor_hdc.read_humi_rh()
+    sensor_hdc.start_conversion()
 
-    # ADXL345 — CH2
-    tca_select(i2c, 2)
-    ax, ay, az = sensor_acc.read_xyz()
+    next_ms = time.ticks_ms()
+    while True:
+        idle_ms = time.ticks_diff(next_ms, time.ticks_ms())
+        if idle_ms > 0:
+            await asyncio.sleep_ms(idle_ms)
+
+        # One tick read per pass, used as the sample timestamp
+        now_ms = time.ticks_ms()
+        _sample_once(i2c, sensor_ppg, sensor_hdc, sensor_acc, sender, now_ms)
+
+        next_ms = time.ticks_add(next_ms, SLEEP_MS)
+        if time.ticks_diff(next_ms, now_ms) <= 0:
+            # Fell behind by a whole period: resync instead of bursting
+            next_ms = time.ticks_add(now_ms, SLEEP_MS)
+        await asyncio.sleep_ms(0)
+
+
+async def main():
+    batch_sender = VitalBatchSender(DEVICE_ID, SERVER_IP, SERVER_PORT,
+                                    VITALS_API_PATH, BATCH_SIZE)
+
+    asyncio.create_task(batch_sender.run())
+    await sample_task(batch_sender)
 
-    # FSR402 (ADC)
-    fsr_raw = read_fsr()
 
-    # Sample every 200ms
-    now_ms = time.ticks_ms()
-    if time.ticks_diff(now_ms, last_send) > SLEEP_MS:
-        last_send = now_ms
-
-        force_value = fsr_raw
-
-        cycle = cycle_counter.next()
-
-        data_point = {
-            "cycle": cycle,
-            "timestamp": now_ms,
-            "vital_signs": {
-                "ppg": {
-                    "ir": 0 if ir is None else ir,
-                    "red": 0 if red is None else red,
-                    "heartrate": 0 if heartrate is None else heartrate,
-                    "spo2": 0 if spo2 is None else spo2
-                },
-                "temperature": temp_c,
-                "humidity": humidity,
-                "force": force_value,
-                "accel": {
-                    "ax": ax,
-                    "ay": ay,
-                    "az": az
-                }
-            }
-        }
-
-        # Debug if needed
-        # print(ujson.dumps(data_point))
-
-        batch_sender.add_point(data_point)
-        # if cycle % 10 == 0:
-        #     print("cycle:", cycle, "hr:", heartrate, "spo2:", spo2)
-
-    time.sleep_ms(5)
+asyncio.run(main())
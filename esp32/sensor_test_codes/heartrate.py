@@ -1,28 +1,51 @@
 # 导入所需要的库
 from machine import Pin, I2C
 import time
+import array
+import micropython
+from micropython import const
 
 # --- 根据数据手册定义常量 ---
-MAX30102_ADDR = 0x57
+MAX30102_ADDR = const(0x57)
 
 # 寄存器地址
-REG_INT_STATUS_1 = 0x00
-REG_INT_ENABLE_1 = 0x02
-REG_FIFO_WR_PTR = 0x04
-REG_OVF_COUNTER = 0x05
-REG_FIFO_RD_PTR = 0x06
-REG_FIFO_DATA = 0x07
-REG_FIFO_CONFIG = 0x08
-REG_MODE_CONFIG = 0x09
-REG_SPO2_CONFIG = 0x0A
-REG_LED1_PA = 0x0C  # RED
-REG_LED2_PA = 0x0D  # IR
-REG_PART_ID = 0xFF
+REG_INT_STATUS_1 = const(0x00)
+REG_INT_ENABLE_1 = const(0x02)
+REG_FIFO_WR_PTR = const(0x04)
+REG_OVF_COUNTER = const(0x05)
+REG_FIFO_RD_PTR = const(0x06)
+REG_FIFO_DATA = const(0x07)
+REG_FIFO_CONFIG = const(0x08)
+REG_MODE_CONFIG = const(0x09)
+REG_SPO2_CONFIG = const(0x0A)
+REG_LED1_PA = const(0x0C)  # RED
+REG_LED2_PA = const(0x0D)  # IR
+REG_PART_ID = const(0xFF)
+
+FIFO_DEPTH = const(32)  # FIFO 最多保存 32 个样本
+
+
+@micropython.viper
+def unpack_max30102(buf: ptr8, n: int, ir: ptr32, red: ptr32):
+    """ 将 n 个 6 字节 FIFO 样本解码为 18 位 IR / RED 值 (原生代码) """
+    for i in range(n):
+        b = i * 6
+        ir[i] = ((buf[b] << 16) | (buf[b + 1] << 8) | buf[b + 2]) & 0x3FFFF
+        red[i] = ((buf[b + 3] << 16) | (buf[b + 4] << 8) | buf[b + 5]) & 0x3FFFF
 
 
 class MAX30102:
     def __init__(self, i2c):
         self.i2c = i2c
+        # 预分配的 FIFO 读取缓冲区和解码结果 (每次读取不再分配内存)
+        self._fifo_buf = bytearray(6 * FIFO_DEPTH)
+        self._fifo_mv = memoryview(self._fifo_buf)
+        self.ir_buf = array.array('i', [0] * FIFO_DEPTH)
+        self.red_buf = array.array('i', [0] * FIFO_DEPTH)
+        # 单字节寄存器读写复用的缓冲区
+        self._rx1 = bytearray(1)
+        self._rx3 = bytearray(3)    # FIFO_WR_PTR, OVF_COUNTER, FIFO_RD_PTR
+        self._tx1 = bytearray(1)
         # 检查设备ID
         part_id = self._read_reg(REG_PART_ID)
         if part_id != 0x15:
@@ -30,13 +53,16 @@ class MAX30102:
         self.setup()
 
     def _read_reg(self, reg, n_bytes=1):
-        """ 读取寄存器 """
-        val = self.i2c.readfrom_mem(MAX30102_ADDR, reg, n_bytes)
-        return val[0] if n_bytes == 1 else val
+        """ 读取寄存器 (单字节读取不分配内存) """
+        if n_bytes == 1:
+            self.i2c.readfrom_mem_into(MAX30102_ADDR, reg, self._rx1)
+            return self._rx1[0]
+        return self.i2c.readfrom_mem(MAX30102_ADDR, reg, n_bytes)
 
     def _write_reg(self, reg, val):
         """ 写入寄存器 """
-        self.i2c.writeto_mem(MAX30102_ADDR, reg, bytes([val]))
+        self._tx1[0] = val & 0xFF
+        self.i2c.writeto_mem(MAX30102_ADDR, reg, self._tx1)
 
     def setup(self):
         """ 配置传感器 """
@@ -64,13 +90,15 @@ class MAX30102:
         print("MAX30102 配置完成。")
 
     def read_fifo(self):
-        """ 从 FIFO 中读取数据 """
+        """ 从 FIFO 中读取全部样本到 ir_buf / red_buf, 返回样本数 """
         # 读取中断状态以清除
         self._read_reg(REG_INT_STATUS_1)
 
-        # 读取 FIFO 读写指针
-        read_ptr = self._read_reg(REG_FIFO_RD_PTR)
-        write_ptr = self._read_reg(REG_FIFO_WR_PTR)
+        # 一次读取连续的 FIFO 写指针 / 溢出计数 / 读指针 (0x04..0x06)
+        ptrs = self._rx3
+        self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_FIFO_WR_PTR, ptrs)
+        write_ptr = ptrs[0]
+        read_ptr = ptrs[2]
 
         # 计算可用样本数
         num_samples = write_ptr - read_ptr
@@ -78,17 +106,14 @@ class MAX30102:
             num_samples += 32
 
         if num_samples > 0:
-            # 读取 6 字节 (1 个样本)
-            data = self._read_reg(REG_FIFO_DATA, 6)
+            # 一次突发读取所有样本 (每个样本 6 字节)
+            self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_FIFO_DATA,
+                                       self._fifo_mv[:num_samples * 6])
 
-            # 组合 3 个字节为一个 18 位数据
-            # 屏蔽掉最高的 2 个未用位
-            ir_val = ((data[0] << 16) | (data[1] << 8) | data[2]) & 0x03FFFF
-            red_val = ((data[3] << 16) | (data[4] << 8) | data[5]) & 0x03FFFF
+            # 组合 3 个字节为一个 18 位数据, 屏蔽掉最高的 2 个未用位
+            unpack_max30102(self._fifo_buf, num_samples, self.ir_buf, self.red_buf)
 
-            return ir_val, red_val
-        else:
-            return None, None
+        return num_samples
 
 
 # --- 主程序 ---
@@ -104,11 +129,11 @@ try:
         sensor = MAX30102(i2c)
 
         while True:
-            ir, red = sensor.read_fifo()
+            n = sensor.read_fifo()
             # 只有当有新数据时才打印
-            if ir is not None and red is not None:
+            for i in range(n):
                 # 打印的是原始的 ADC 计数值，反映了光的反射强度
-                print(f"IR: {ir}, Red: {red}")
+                print(f"IR: {sensor.ir_buf[i]}, Red: {sensor.red_buf[i]}")
             time.sleep_ms(100)  # 每 100ms 检查一次
 
     else:
@@ -1,9 +1,14 @@
-from machine import Pin, I2C
+from machine import Pin, I2C, Timer
 import time
+import uasyncio as asyncio
+import array
+import math
+import micropython
+from micropython import const
 
 # --- Sampling configuration ---
-SAMPLE_RATE_HZ = 10            # actual effective sampling rate
-SLEEP_MS = 1000 // SAMPLE_RATE_HZ
+SAMPLE_RATE_HZ = const(10)     # actual effective sampling rate
+SLEEP_MS = const(1000 // SAMPLE_RATE_HZ)
 
 
 ##################################################
@@ -12,13 +17,25 @@ SLEEP_MS = 1000 // SAMPLE_RATE_HZ
 #    This multiplexer selects one of 8 I2C channels.
 ##################################################
 
-TCA_ADDR = 0x70
+TCA_ADDR = const(0x70)
+
+# Last channel written to the TCA9548A (-1 = unknown, forces the next write)
+_tca_current = -1
 
 def tca_select(i2c, channel):   # we can use channel 0-7
+    global _tca_current
+    if channel == _tca_current:
+        return  # Already routed to this channel, skip the write + settling
     if channel > 7:
         return
-    i2c.writeto(TCA_ADDR, bytes([1 << channel]))
+    try:
+        i2c.writeto(TCA_ADDR, bytes([1 << channel]))
+    except OSError:
+        # Mux state is unknown after a failed write; resync on the next call
+        _tca_current = -1
+        raise
     time.sleep_ms(5)  # Required settling time
+    _tca_current = channel
 
 
 ##################################################
@@ -28,41 +45,199 @@ def tca_select(i2c, channel):   # we can use channel 0-7
 ##################################################
 
 # MAX30102 I2C address
-MAX30102_ADDR = 0x57
+MAX30102_ADDR = const(0x57)
 
 # --- Algorithm related constants ---
-WINDOW_SECONDS = 8             # Length of HR analysis window (seconds)
-MIN_WINDOW_SECONDS = 4         # HR estimation minimal data length (seconds)
-MAX_SAMPLES = SAMPLE_RATE_HZ * WINDOW_SECONDS
+WINDOW_SECONDS = const(8)      # Length of HR analysis window (seconds)
+MIN_WINDOW_SECONDS = const(4)  # HR estimation minimal data length (seconds)
+MAX_SAMPLES = const(SAMPLE_RATE_HZ * WINDOW_SECONDS)
+MIN_SAMPLES = const(SAMPLE_RATE_HZ * MIN_WINDOW_SECONDS)
+SPO2_MIN_SECONDS = const(4)    # SpO2 minimal data length; keep >= MIN_WINDOW_SECONDS
+SPO2_MIN_SAMPLES = const(SAMPLE_RATE_HZ * SPO2_MIN_SECONDS)
 
 # The actual internal sample rate of MAX30102 (set by register 0x0A)
-SENSOR_SAMPLE_RATE_HZ = 100
+SENSOR_SAMPLE_RATE_HZ = const(100)
 
 # Simple integer downsampling factor. Avoid overwhelming the ESP32. TODO: try different rates
-DOWNSAMPLE_FACTOR = SENSOR_SAMPLE_RATE_HZ // SAMPLE_RATE_HZ
+DOWNSAMPLE_FACTOR = const(SENSOR_SAMPLE_RATE_HZ // SAMPLE_RATE_HZ)
 
 # Register addresses (MAX30102)
-REG_INTR_STATUS_1 = 0x00
-REG_INTR_STATUS_2 = 0x01
-REG_INTR_ENABLE_1 = 0x02
-REG_INTR_ENABLE_2 = 0x03
-
-REG_FIFO_WR_PTR   = 0x04
-REG_OVF_COUNTER   = 0x05
-REG_FIFO_RD_PTR   = 0x06
-REG_FIFO_DATA     = 0x07
-REG_FIFO_CONFIG   = 0x08
-
-REG_MODE_CONFIG   = 0x09
-REG_SPO2_CONFIG   = 0x0A
-
-REG_LED1_PA       = 0x0C   # RED LED pulse amplitude
-REG_LED2_PA       = 0x0D   # IR LED pulse amplitude
-
-REG_TEMP_INT      = 0x1F
-REG_TEMP_FRAC     = 0x20
-
-REG_PART_ID       = 0xFF   # Should be 0x15 for MAX30102
+REG_INTR_STATUS_1 = const(0x00)
+REG_INTR_STATUS_2 = const(0x01)
+REG_INTR_ENABLE_1 = const(0x02)
+REG_INTR_ENABLE_2 = const(0x03)
+
+REG_FIFO_WR_PTR   = const(0x04)
+REG_OVF_COUNTER   = const(0x05)
+REG_FIFO_RD_PTR   = const(0x06)
+REG_FIFO_DATA     = const(0x07)
+REG_FIFO_CONFIG   = const(0x08)
+
+REG_MODE_CONFIG   = const(0x09)
+REG_SPO2_CONFIG   = const(0x0A)
+
+REG_LED1_PA       = const(0x0C)  # RED LED pulse amplitude
+REG_LED2_PA       = const(0x0D)  # IR LED pulse amplitude
+
+REG_TEMP_INT      = const(0x1F)
+REG_TEMP_FRAC     = const(0x20)
+
+REG_PART_ID       = const(0xFF)  # Should be 0x15 for MAX30102
+
+FIFO_DEPTH = const(32)         # Samples held by the MAX30102 FIFO
+
+# GPIO wired to the MAX30102 INT output (optional). None = poll the FIFO
+# every loop. With a pin, only the FIFO almost-full interrupt is enabled
+# (A_FULL=15: fires with 17 samples queued) and the FIFO is drained in
+# one burst per interrupt.
+MAX30102_INT_PIN = None
+
+# Set by the INT falling-edge ISR; a bytearray so the ISR does not allocate
+_ppg_irq_flag = bytearray(1)
+
+def _on_ppg_int(pin):
+    _ppg_irq_flag[0] = 1
+
+_PPG_MASK = const(0x03FFFF)    # 18-bit ADC value
+
+# Slots of the _read_fifo_into_window() state array (viper takes at most 4 args)
+_FS_N = const(0)       # in: FIFO entries in the burst buffer
+_FS_HEAD = const(1)    # in/out: next write position in the rings
+_FS_SIZE = const(2)    # in: ring length
+_FS_PHASE = const(3)   # in/out: decimation counter
+_FS_RED_SUM = const(4) # in/out: running sum of the RED ring
+_FS_IR_SUM = const(5)  # in/out: running sum of the IR ring
+
+# Slots of the _window_min_max() output
+_MM_RED_MIN = const(0)
+_MM_RED_MAX = const(1)
+_MM_IR_MIN = const(2)
+_MM_IR_MAX = const(3)
+
+# Slots of the _win_ac() argument array
+_AC_HEAD = const(0)    # Next write position of the ring
+_AC_MEAN = const(1)    # DC level to subtract
+_AC_SHIFT = const(2)   # Right shift that scales the AC part
+
+# Heart-rate search range of the Goertzel scan (BPM)
+HR_MIN_BPM = const(40)
+HR_MAX_BPM = const(180)
+HR_STEP_BPM = const(2)
+_GOERTZEL_Q = const(12)    # Fixed-point bits of the Goertzel coefficients
+_HR_AMP_BITS = const(8)    # AC signal is scaled below 2^8 so the int32 state cannot overflow
+
+# HR signal-quality gate (heuristic, like the SpO2 checks)
+HR_MIN_IR_DC = const(5000)        # Lower IR level means no finger / poor contact
+HR_MIN_PERFUSION_INV = const(1000)  # IR peak-to-peak must be >= DC / 1000
+HR_MIN_PEAK_RATIO = const(8)      # Best candidate power vs. mean over all candidates;
+                                  # white noise peaks around 4-6, a clean pulse near 19
+
+
+@micropython.viper
+def _goertzel(src: ptr32, n: int, coeff: int, out: ptr32):
+    """
+    Goertzel recursion over src[0:n] with coeff = 2*cos(w) in Q12.
+    out[0] = s[n-1], out[1] = s[n-2]; the caller computes the bin power.
+    """
+    s1 = 0
+    s2 = 0
+    for i in range(n):
+        s = src[i] + ((coeff * s1) >> _GOERTZEL_Q) - s2
+        s2 = s1
+        s1 = s
+    out[0] = s1
+    out[1] = s2
+
+
+@micropython.viper
+def _unpack_fifo(buf: ptr8, red: ptr32, ir: ptr32, st: ptr32) -> int:
+    """
+    Decode st[_FS_N] 6-byte FIFO samples (18-bit big-endian RED then IR)
+    from buf straight into the red / ir rings at st[_FS_HEAD], keeping one
+    of every DOWNSAMPLE_FACTOR valid samples and skipping all-zero ones.
+    Updates head, decimation phase and the ring sums in st (unused slots
+    are 0, so replacing the old value keeps the sums exact); returns the
+    samples stored.
+    """
+    n = st[_FS_N]
+    head = st[_FS_HEAD]
+    size = st[_FS_SIZE]
+    phase = st[_FS_PHASE]
+    red_sum = st[_FS_RED_SUM]
+    ir_sum = st[_FS_IR_SUM]
+    step = int(DOWNSAMPLE_FACTOR)
+    stored = 0
+    o = 0
+    for i in range(n):
+        r = ((buf[o] << 16) | (buf[o + 1] << 8) | buf[o + 2]) & _PPG_MASK
+        v = ((buf[o + 3] << 16) | (buf[o + 4] << 8) | buf[o + 5]) & _PPG_MASK
+        o += 6
+        if (r | v) == 0:
+            continue
+        phase += 1
+        if phase < step:
+            continue
+        phase = 0
+        red_sum += r - red[head]
+        ir_sum += v - ir[head]
+        red[head] = r
+        ir[head] = v
+        head += 1
+        if head == size:
+            head = 0
+        stored += 1
+    st[_FS_HEAD] = head
+    st[_FS_PHASE] = phase
+    st[_FS_RED_SUM] = red_sum
+    st[_FS_IR_SUM] = ir_sum
+    return stored
+
+
+@micropython.viper
+def _window_min_max(red: ptr32, ir: ptr32, n: int, out: ptr32):
+    """
+    Min and max of red[0:n] and ir[0:n] in one pass, written to out[_MM_*].
+    Order does not matter, so the rings are read in place.
+    """
+    red_lo = red[0]
+    red_hi = red_lo
+    ir_lo = ir[0]
+    ir_hi = ir_lo
+    for i in range(1, n):
+        r = red[i]
+        v = ir[i]
+        if r < red_lo:
+            red_lo = r
+        if r > red_hi:
+            red_hi = r
+        if v < ir_lo:
+            ir_lo = v
+        if v > ir_hi:
+            ir_hi = v
+    out[_MM_RED_MIN] = red_lo
+    out[_MM_RED_MAX] = red_hi
+    out[_MM_IR_MIN] = ir_lo
+    out[_MM_IR_MAX] = ir_hi
+
+
+@micropython.viper
+def _win_ac(ring: ptr32, args: ptr32, dst: ptr32, count: int):
+    """
+    Copy the count newest entries of a ring (next write at args[_AC_HEAD])
+    into dst, oldest first, as (value - args[_AC_MEAN]) >> args[_AC_SHIFT]
+    (DC removal and scaling).
+    """
+    size = int(MAX_SAMPLES)
+    mean = args[_AC_MEAN]
+    shift = args[_AC_SHIFT]
+    j = args[_AC_HEAD] - count
+    if j < 0:
+        j += size
+    for i in range(count):
+        dst[i] = (ring[j] - mean) >> shift
+        j += 1
+        if j == size:
+            j = 0
 
 
 class MAX30102:
@@ -77,23 +252,54 @@ class MAX30102:
       - estimate_hr_simple() -> hr_bpm (float) or None
     """
 
-    def __init__(self, i2c):
+    def __init__(self, i2c, int_pin=None):
         self.i2c = i2c
 
-        # --- Internal buffers for downsampled data (for HR / SpO2 estimation) ---
-        self.ir_window = []           # Downsampled IR samples
-        self.red_window = []          # Downsampled RED samples
-        self._downsample_counter = 0  # Counter for integer decimation
+        # --- Internal ring buffers for downsampled data (for HR / SpO2 estimation) ---
+        self.ir_window = array.array('i', [0] * MAX_SAMPLES)    # Downsampled IR samples
+        self.red_window = array.array('i', [0] * MAX_SAMPLES)   # Downsampled RED samples
+        self._win_head = 0            # Next write position in the windows
+        self._win_count = 0           # Valid samples in the windows (<= MAX_SAMPLES)
+
+        # --- FIFO burst buffer and unpack state (reused every read) ---
+        self._fifo_buf = bytearray(FIFO_DEPTH * 6)
+        self._fifo_mv = memoryview(self._fifo_buf)
+        self._fifo_state = array.array('i', [0] * 6)   # _FS_* slots
+
+        # --- Reused I2C buffers (no allocation per register access) ---
+        self._rx1 = bytearray(1)     # Single register read
+        self._rx2 = bytearray(2)     # INTR_STATUS_1..2
+        self._rx3 = bytearray(3)     # FIFO_WR_PTR..FIFO_RD_PTR
+        self._tx1 = bytearray(1)     # Single register write
+
+        # --- Work buffers for HR estimation (reused every call) ---
+        self._ac = array.array('i', [0] * MAX_SAMPLES)   # DC-removed, scaled IR, time order
+        self._ac_args = array.array('i', [0] * 3)        # _AC_* slots for _win_ac
+        self._mm = array.array('i', [0] * 4)             # _MM_* window min / max
+        self._gz = array.array('i', [0, 0])              # Goertzel state output
+        # Q12 Goertzel coefficients 2*cos(w), one per candidate heart rate
+        self._hr_coeffs = array.array('i', [
+            int(2.0 * math.cos(2.0 * math.pi * bpm / (60.0 * SAMPLE_RATE_HZ)) * (1 << _GOERTZEL_Q))
+            for bpm in range(HR_MIN_BPM, HR_MAX_BPM + 1, HR_STEP_BPM)
+        ])
 
         # --- SpO2 estimation state ---
         self._last_spo2 = None       # Last smoothed SpO2 value
         self._spo2_alpha = 0.3       # EMA smoothing factor (0..1)
 
+        # --- Optional interrupt-driven reads (INT is active low) ---
+        self._int_pin = None
+        if int_pin is not None:
+            self._int_pin = Pin(int_pin, Pin.IN, Pin.PULL_UP)
+
         # --- Basic configuration and sanity check ---
         self._check_part_id()
         self._configure_sensor()
         self._clear_fifo_pointers()
 
+        if self._int_pin is not None:
+            self._int_pin.irq(trigger=Pin.IRQ_FALLING, handler=_on_ppg_int)
+
 
     def debug_dump_once(self):
         st1 = self._read_reg(REG_INTR_STATUS_1)
@@ -111,15 +317,36 @@ class MAX30102:
     #  Low-level I2C helpers
     # -------------------------------------------------------------------------
     def _read_reg(self, reg, n_bytes=1):
-        """Read 1 or more bytes from a register."""
-        data = self.i2c.readfrom_mem(MAX30102_ADDR, reg, n_bytes)
+        """
+        Read 1 or more bytes from a register.
+        Single-byte reads use a reused buffer (no allocation).
+        """
         if n_bytes == 1:
-            return data[0]
-        return data
+            self.i2c.readfrom_mem_into(MAX30102_ADDR, reg, self._rx1)
+            return self._rx1[0]
+        return self.i2c.readfrom_mem(MAX30102_ADDR, reg, n_bytes)
 
     def _write_reg(self, reg, value):
         """Write 1 byte to a register."""
-        self.i2c.writeto_mem(MAX30102_ADDR, reg, bytes([value & 0xFF]))
+        self._tx1[0] = value & 0xFF
+        self.i2c.writeto_mem(MAX30102_ADDR, reg, self._tx1)
+
+    def _read_fifo_ptrs(self):
+        """
+        Read FIFO_WR_PTR, OVF_COUNTER and FIFO_RD_PTR (contiguous, 0x04..0x06)
+        in one 3-byte transaction. Returns (wr, ovf, rd).
+        """
+        ptrs = self._rx3
+        self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_FIFO_WR_PTR, ptrs)
+        return ptrs[0], ptrs[1], ptrs[2]
+
+    def _read_intr_status(self):
+        """
+        Read (and so clear) INTR_STATUS_1 and _2 in one 2-byte transaction.
+        Returns INTR_STATUS_1.
+        """
+        self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_INTR_STATUS_1, self._rx2)
+        return self._rx2[0]
 
     # -------------------------------------------------------------------------
     #  Sensor configuration
@@ -158,8 +385,9 @@ class MAX30102:
         self._write_reg(REG_LED1_PA, 0x24)  # Red LED
         self._write_reg(REG_LED2_PA, 0x24)  # IR LED
 
-        # 6. Enable interrupts: A_FULL + PPG_RDY
-        self._write_reg(REG_INTR_ENABLE_1, 0xC0)
+        # 6. Enable interrupts: A_FULL + PPG_RDY, or only A_FULL when INT
+        #    is wired so it fires once per batch rather than per sample
+        self._write_reg(REG_INTR_ENABLE_1, 0xC0 if self._int_pin is None else 0x80)
         self._write_reg(REG_INTR_ENABLE_2, 0x00)
 
         # 7. Finally, set SpO2 mode
@@ -172,84 +400,81 @@ class MAX30102:
         self._write_reg(REG_FIFO_RD_PTR, 0x00)
 
         # Clear any pending interrupts
-        _ = self._read_reg(REG_INTR_STATUS_1)
-        _ = self._read_reg(REG_INTR_STATUS_2)
+        self._read_intr_status()
 
     # -------------------------------------------------------------------------
     #  FIFO reading and window management
     # -------------------------------------------------------------------------
-    def _read_fifo_samples(self):
+    def _read_fifo_into_window(self):
         """
-        Robust FIFO reading for buggy pointer chips.
-        - Uses Observer pattern: observe INT_STATUS1 to decide reads.
-        - Producer-Consumer: sensor produces samples, we consume until empty.
-        - Error handling: timeout, I2C exceptions, invalid data checks.
+        Read all pending FIFO samples in one I2C burst and store every
+        DOWNSAMPLE_FACTOR-th valid one into the ir_window / red_window rings
+        from _win_head on, wrapping at the end. The running ring sums in
+        _fifo_state are updated along the way, so only the internal windows
+        may be written here. Returns the number of samples stored.
+        - The sample count comes from the FIFO write/read pointers (a
+          non-zero overflow counter means the FIFO is full).
+        - Buggy pointer chips: if the pointers report nothing but PPG_RDY
+          is set, a single sample is read instead.
+        - Error handling: I2C exceptions, invalid data checks.
         """
-        samples = []
-        max_reads = 32  # Max to prevent infinite loop (FIFO depth)
-        read_count = 0
-
         try:
-            while read_count < max_reads:
-                # Clear and check interrupt status
-                intr1 = self._read_reg(REG_INTR_STATUS_1)
-                _ = self._read_reg(REG_INTR_STATUS_2)
+            wr, ovf, rd = self._read_fifo_ptrs()
+            n = FIFO_DEPTH if ovf else (wr - rd) & (FIFO_DEPTH - 1)
 
-                # If no PPG_RDY, stop
+            if n == 0:
+                # Clear interrupt status; PPG_RDY set means pointers lied
+                intr1 = self._read_intr_status()
                 if (intr1 & 0x40) == 0:
-                    break
+                    return 0
+                n = 1
 
-                # Read 1 sample (6 bytes)
-                raw = self._read_reg(REG_FIFO_DATA, 6)
-
-                # Extract and validate
-                red = ((raw[0] << 16) | (raw[1] << 8) | raw[2]) & 0x03FFFF
-                ir = ((raw[3] << 16) | (raw[4] << 8) | raw[5]) & 0x03FFFF
-
-                # Basic validation: skip if data is zero/invalid
-                if red == 0 and ir == 0:
-                    continue
-
-                samples.append((red, ir))
-                read_count += 1
-
-                # Small delay to avoid I2C overload
-                time.sleep_ms(1)
+            # One burst; FIFO_DATA does not auto-increment, the FIFO advances
+            self.i2c.readfrom_mem_into(MAX30102_ADDR, REG_FIFO_DATA, self._fifo_mv[:n * 6])
 
         except OSError as e:
             print("I2C error in FIFO read:", e)
-            return []  # Return empty on error
+            return 0  # Nothing on error
 
-        # logging for production debugging
-        # if read_count > 0:
-        #     print("Read %d samples from FIFO" % read_count)
+        st = self._fifo_state
+        st[_FS_N] = n
+        st[_FS_HEAD] = self._win_head
+        st[_FS_SIZE] = MAX_SAMPLES
+        return _unpack_fifo(self._fifo_buf, self.red_window, self.ir_window, st)
 
-        return samples
+    def _data_ready(self):
+        """
+        With an INT pin, report whether the FIFO almost-full interrupt fired
+        and clear its status so INT can fire again. Without one, always True
+        (poll the FIFO).
+        """
+        if self._int_pin is None:
+            return True
+        # INT is active low and stays asserted until INTR_STATUS is read, so
+        # the level check also catches an interrupt that was already pending
+        # before the falling-edge handler was attached (no edge will follow)
+        if not _ppg_irq_flag[0] and self._int_pin.value():
+            return False
+        _ppg_irq_flag[0] = 0
+        try:
+            self._read_intr_status()
+        except OSError:
+            pass
+        return True
 
     def _update_window_from_sensor(self):
         """
-        Read all available FIFO samples, downsample them, and update the
+        Read all available FIFO samples, downsampled, directly into the
         internal RED/IR sliding windows.
         """
-        samples = self._read_fifo_samples()
-        if not samples:
+        if not self._data_ready():
             return
-
-        for red, ir in samples:
-            # Integer decimation: keep one sample every DOWNSAMPLE_FACTOR
-            self._downsample_counter += 1
-            if self._downsample_counter < DOWNSAMPLE_FACTOR:
-                continue
-            self._downsample_counter = 0
-
-            self.red_window.append(red)
-            self.ir_window.append(ir)
-
-            # Limit window length to MAX_SAMPLES
-            if len(self.ir_window) > MAX_SAMPLES:
-                # For small windows (e.g., 80 samples), pop(0) cost is acceptable
-                self.ir_window.pop(0)
-                self.red_window.pop(0)
+        stored = self._read_fifo_into_window()
+        if not stored:
+            return
+        # Overwrite the oldest samples once the windows are full
+        self._win_head = (self._win_head + stored) % MAX_SAMPLES
+        self._win_count = min(self._win_count + stored, MAX_SAMPLES)
 
     # -------------------------------------------------------------------------
     #  Public data access
@@ -263,36 +488,30 @@ class MAX30102:
         # First, pull in all pending samples from sensor
         self._update_window_from_sensor()
 
-        if not self.ir_window:
+        if not self._win_count:
             return None, None
 
         # Keep API simple: always return (red, ir)
-        return self.red_window[-1], self.ir_window[-1]
+        last = (self._win_head - 1) % MAX_SAMPLES
+        return self.red_window[last], self.ir_window[last]
 
     # -------------------------------------------------------------------------
     #  Simple heart rate estimation (from internal IR window)
     # -------------------------------------------------------------------------
-    @staticmethod
-    def _moving_average(signal, window):
-        """Simple moving average, padded to original length."""
-        n = len(signal)
-        if window <= 1 or n <= window:
-            return signal[:]
-        out = []
-        s = 0
-        for i in range(window):
-            s += signal[i]
-        out.append(s / window)
-        for i in range(window, n):
-            s += signal[i] - signal[i - window]
-            out.append(s / window)
-        pad_len = window - 1
-        return [out[0]] * pad_len + out
-
     def estimate_hr_simple(self):
         """
         Estimate heart rate (BPM) from the internal IR window.
 
+        Scans HR_MIN_BPM..HR_MAX_BPM in HR_STEP_BPM steps with a Goertzel
+        filter (native code, fixed point) and returns the frequency with the
+        most power, refined by parabolic interpolation. No smoothing or
+        peak lists are involved.
+
+        The window is rejected (None) without a usable pulse: IR level below
+        HR_MIN_IR_DC (no finger), peak-to-peak below 1/HR_MIN_PERFUSION_INV
+        of the DC level, or no candidate standing HR_MIN_PEAK_RATIO times
+        above the mean power of the scan (noise / drift only).
+
         Uses:
           - SAMPLE_RATE_HZ as effective sampling rate on the window
           - MIN_WINDOW_SECONDS and WINDOW_SECONDS for data length checks
@@ -300,70 +519,72 @@ class MAX30102:
         :return: heart rate in BPM (float) or None if not enough / unreliable
         """
         ir_buffer = self.ir_window
-        n = len(ir_buffer)
+        n = self._win_count
 
         # Require at least MIN_WINDOW_SECONDS worth of data
-        min_samples = int(SAMPLE_RATE_HZ * MIN_WINDOW_SECONDS)
-        if n < min_samples:
+        if n < MIN_SAMPLES:
             return None
 
-        # Use only last WINDOW_SECONDS of data
-        if n > MAX_SAMPLES:
-            data = ir_buffer[-MAX_SAMPLES:]
-        else:
-            data = ir_buffer[:]
-
-        if not data:
+        # 1) Remove DC component and scale the AC part below 2^_HR_AMP_BITS.
+        #    The ring sum is kept up to date as samples come in
+        mean_val = self._fifo_state[_FS_IR_SUM] // n
+        if mean_val < HR_MIN_IR_DC:
             return None
-
-        # 1) Remove DC component
-        mean_val = sum(data) / len(data)
-        ac = [x - mean_val for x in data]
-
-        # 2) Smooth with a small moving average window
-        smoothed = MAX30102._moving_average(ac, 5)
-
-        # 3) Peak detection
-        max_val = max(smoothed)
-        if max_val <= 0:
+        mm = self._mm
+        _window_min_max(self.red_window, ir_buffer, n, mm)
+        if (mm[_MM_IR_MAX] - mm[_MM_IR_MIN]) * HR_MIN_PERFUSION_INV < mean_val:
             return None
-
-        threshold = 0.3 * max_val  # 30% of peak amplitude
-        # Minimal distance between peaks (in samples), assuming max HR ~200 bpm
-        min_distance = int(0.3 * SAMPLE_RATE_HZ)  # 0.3 s
-
-        peaks = []
-        last_peak = -min_distance
-
-        # Simple local maxima detection
-        for i in range(1, len(smoothed) - 1):
-            if (smoothed[i] > threshold and
-                smoothed[i] > smoothed[i - 1] and
-                smoothed[i] > smoothed[i + 1]):
-                if i - last_peak >= min_distance:
-                    peaks.append(i)
-                    last_peak = i
-
-        if len(peaks) < 2:
+        amp = max(mm[_MM_IR_MAX] - mean_val, mean_val - mm[_MM_IR_MIN])
+        if amp <= 0:
             return None
-
-        # 4) Compute RR intervals and HR
-        intervals = []
-        for i in range(1, len(peaks)):
-            dt_samples = peaks[i] - peaks[i - 1]
-            if dt_samples <= 0:
-                continue
-            rr = dt_samples / float(SAMPLE_RATE_HZ)
-            intervals.append(rr)
-
-        if not intervals:
+        shift = 0
+        while (amp >> shift) >= (1 << _HR_AMP_BITS):
+            shift += 1
+        args = self._ac_args
+        args[_AC_HEAD] = self._win_head
+        args[_AC_MEAN] = mean_val
+        args[_AC_SHIFT] = shift
+        ac = self._ac
+        _win_ac(ir_buffer, args, ac, n)
+
+        # 2) Goertzel power for every candidate heart rate
+        coeffs = self._hr_coeffs
+        gz = self._gz
+        #    The strongest candidate and its two neighbours are tracked as
+        #    the scan goes, so no list of powers is built
+        best = -1
+        p1 = 0            # Power of the best candidate so far
+        p0 = None         # ... of the candidate before it
+        p2 = None         # ... and after it
+        prev = None
+        total = 0         # Sum of all powers, for the peak-to-average check
+        i = 0
+        for coeff in coeffs:
+            _goertzel(ac, n, coeff, gz)
+            s1 = gz[0]
+            s2 = gz[1]
+            p = s1 * s1 + s2 * s2 - ((coeff * s1 * s2) >> _GOERTZEL_Q)
+            total += p
+            if p > p1:
+                best = i
+                p0 = prev
+                p1 = p
+                p2 = None
+            elif i == best + 1:
+                p2 = p
+            prev = p
+            i += 1
+        if best < 0 or p1 * i < HR_MIN_PEAK_RATIO * total:
             return None
 
-        rr_mean = sum(intervals) / len(intervals)
-        if rr_mean <= 0:
-            return None
+        # 3) Parabolic interpolation between the neighbouring candidates
+        offset = 0.0
+        if p0 is not None and p2 is not None:
+            denom = p0 - 2 * p1 + p2
+            if denom != 0:
+                offset = 0.5 * (p0 - p2) / denom
 
-        hr_bpm = 60.0 / rr_mean
+        hr_bpm = HR_MIN_BPM + (best + offset) * HR_STEP_BPM
         return hr_bpm
 
     def estimate_spo2_simple(self):
@@ -374,40 +595,20 @@ class MAX30102:
         Returns:
             Smoothed SpO2 percentage (float) or None if data is unreliable.
         """
-        red_buffer = self.red_window
-        ir_buffer = self.ir_window
 
         # -------------------------------
         # 0) Check minimal data length
         # -------------------------------
-        try:
-            min_seconds = max(4.0, MIN_WINDOW_SECONDS)  # Prefer at least ~4s for SpO2
-            min_samples = int(SAMPLE_RATE_HZ * min_seconds)
-        except NameError:
-            # Fallback if constants are not defined
-            min_samples = 80  # e.g., ~3–4s at 20–30 Hz effective rate
-
-        n = min(len(red_buffer), len(ir_buffer))
-        if n < min_samples:
-            return None
-
-        # Use up to MAX_SAMPLES most recent data if defined, otherwise use all
-        try:
-            window_len = min(n, MAX_SAMPLES)
-        except NameError:
-            window_len = n
-
-        red_data = red_buffer[-window_len:]
-        ir_data = ir_buffer[-window_len:]
-
-        if not red_data or not ir_data:
+        n = self._win_count
+        if n < SPO2_MIN_SAMPLES:
             return None
 
         # -------------------------------
         # 1) DC components (mean values)
         # -------------------------------
-        red_dc = sum(red_data) / len(red_data)
-        ir_dc = sum(ir_data) / len(ir_data)
+        # (running ring sums, kept up to date as samples come in)
+        red_dc = self._fifo_state[_FS_RED_SUM] / n
+        ir_dc = self._fifo_state[_FS_IR_SUM] / n
 
         # DC level sanity checks
         # Threshold values are heuristic and may need tuning for your hardware.
@@ -418,11 +619,12 @@ class MAX30102:
         # -------------------------------
         # 2) AC components (peak-to-peak)
         # -------------------------------
-        red_ac_signal = [x - red_dc for x in red_data]
-        ir_ac_signal = [x - ir_dc for x in ir_data]
-
-        red_ac = max(red_ac_signal) - min(red_ac_signal)
-        ir_ac = max(ir_ac_signal) - min(ir_ac_signal)
+        # (peak-to-peak does not change when the DC level is subtracted;
+        # one native pass over the rings covers both channels)
+        mm = self._mm
+        _window_min_max(self.red_window, self.ir_window, n, mm)
+        red_ac = mm[_MM_RED_MAX] - mm[_MM_RED_MIN]
+        ir_ac = mm[_MM_IR_MAX] - mm[_MM_IR_MIN]
 
         # AC must be clearly above noise; thresholds are rough heuristics.
         if red_ac <= 0 or ir_ac <= 0:
@@ -477,6 +679,41 @@ class MAX30102:
 
 
 # --- Main program ---
+# Set by the estimate timer's callback; a ThreadSafeFlag can be set from
+# outside the event loop
+_estimate_due = asyncio.ThreadSafeFlag()
+
+
+async def run(sensor):
+    """Update the window and print HR / SpO2 on every SLEEP_MS timer tick."""
+    timer = Timer(0)
+    timer.init(period=SLEEP_MS, mode=Timer.PERIODIC, callback=lambda t: _estimate_due.set())
+    while True:
+        await _estimate_due.wait()
+
+        red, ir = sensor.get_latest_pair()
+
+        # sensor.debug_dump_once()
+
+        if (red is None) or (ir is None):
+            # No new data yet
+            continue
+
+        # (Optional) print raw values for debugging
+        # print("IR:", ir, "Red:", red)
+
+        heartrate = sensor.estimate_hr_simple()
+        spo2 = sensor.estimate_spo2_simple()
+        if (heartrate is not None) and (spo2 is not None):
+            print("HR: %.1f bpm, SpO2: %.1f%%" % (heartrate, spo2))
+        elif heartrate is not None:
+            print("HR: %.1f bpm, SpO2: --%%" % (heartrate))
+        elif spo2 is not None:
+            print("HR: -- bpm, SpO2: %.1f%%" % (spo2))
+        else:
+            print("HR: -- bpm, SpO2: --%%")
+
+
 try:
     # Initialize I2C
     # !!! Adjust pins according to your ESP32 board wiring !!!
@@ -492,41 +729,9 @@ try:
     if MAX30102_ADDR in devices:
         print("MAX30102 found at 0x%02X" % MAX30102_ADDR)
 
-        sensor = MAX30102(i2c)
-
-        last_hr_print_ms = time.ticks_ms()
-
-        while True:
-            red, ir = sensor.get_latest_pair()
-
-            # sensor.debug_dump_once()
-
-            if (red is None) or (ir is None):
-                # No new data yet
-                time.sleep_ms(10)
-                continue
-
-            # (Optional) print raw values for debugging
-            # print("IR:", ir, "Red:", red)
-
-            # Estimate HR every ~1 second
-            now = time.ticks_ms()
-            if time.ticks_diff(now, last_hr_print_ms) >= SLEEP_MS:
-                heartrate = sensor.estimate_hr_simple()
-                spo2 = sensor.estimate_spo2_simple()
-                if (heartrate is not None) and (spo2 is not None):
-                    print("HR: %.1f bpm, SpO2: %.1f%%" % (heartrate, spo2))
-                elif heartrate is not None:
-                    print("HR: %.1f bpm, SpO2: --%%" % (heartrate))
-                elif spo2 is not None:
-                    print("HR: -- bpm, SpO2: %.1f%%" % (spo2))
-                else:
-                    print("HR: -- bpm, SpO2: --%%")
-                last_hr_print_ms = now
-
-            # Small delay to avoid busy loop
-            time.sleep_ms(10)
+        sensor = MAX30102(i2c, MAX30102_INT_PIN)
 
+        asyncio.run(run(sensor))
     else:
         print("ERROR: MAX30102 not found on I2C bus.")
         print("Scanned devices:", [hex(d) for d in devices])
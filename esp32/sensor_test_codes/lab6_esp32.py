@@ -1,77 +1,113 @@
 # ===== Smartwatch HAR: Streaming & On-Demand Prediction =====
 #
-# This version streams accelerometer data point-by-point and then
-# triggers a prediction from the server on-demand.
+# This version collects a window of accelerometer data and posts it as one
+# packed binary payload; the server runs the model on that window and
+# returns the prediction in the same response. Networking and the display
+# run as uasyncio tasks, so neither blocks the other.
 
 import network
-import urequests
+import uasyncio as asyncio
+import json
 import time
+import gc
 import struct
-from machine import Pin, SPI, I2C
+import array
+import machine
+from micropython import const
+from machine import Pin, SPI, I2C, Timer
 from ssd1306 import SSD1306_I2C
 
 # ===== OLED Display Configuration =====
-OLED_WIDTH = 128
-OLED_HEIGHT = 32
-OLED_SCL_PIN = 20
-OLED_SDA_PIN = 22
+OLED_WIDTH = const(128)
+OLED_HEIGHT = const(32)
+OLED_SCL_PIN = const(20)
+OLED_SDA_PIN = const(22)
 
 i2c = I2C(0, scl=Pin(OLED_SCL_PIN), sda=Pin(OLED_SDA_PIN))
 oled = SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c)
 
 
+OLED_LINE_Y = (0, 10, 25)   # Top row of each text line (8 px high)
+_shown_lines = [None, None, None]   # Text currently on the display
+
+
 def show_text(line1, line2="", line3=""):
-    """Utility function to display three lines of text on the OLED."""
-    oled.fill(0)
-    oled.text(line1, 0, 0)
-    oled.text(line2, 0, 10)
-    oled.text(line3, 0, 25)
-    oled.show()
+    """
+    Utility function to display three lines of text on the OLED.
+    Only lines whose text changed are cleared and redrawn, and nothing is
+    sent over I2C when all three are unchanged (e.g. a repeated counter).
+    """
+    changed = False
+    for k, line in enumerate((line1, line2, line3)):
+        if line != _shown_lines[k]:
+            y = OLED_LINE_Y[k]
+            oled.fill_rect(0, y, OLED_WIDTH, 8, 0)
+            oled.text(line, 0, y)
+            _shown_lines[k] = line
+            changed = True
+    if changed:
+        oled.show()
 
 
 # ===== ADXL345 Accelerometer SPI Driver =====
-# (This class remains unchanged from your original code)
-class PhysicsEngine:
+class ADXL345:
     # ADXL345 Constants
     SPI_READ = 0x80
     SPI_MULTI_BYTE = 0x40
     DEVID = 0x00
+    BW_RATE = 0x2C
     POWER_CTL = 0x2D
     DATAX0 = 0x32
+    FIFO_CTL = 0x38
+    FIFO_STATUS = 0x39
     SCALE_FACTOR = 0.004
 
-    # Physics arguments
-    DAMPING = 0.95
-    ACCEL_SENSITIVITY = 0.2
-    TEXT_BLOCK_WIDTH = 56
-    TEXT_BLOCK_HEIGHT = 16
-
-    def __init__(self, spi, cs, oled_width, oled_height):
-
-        self.disable = False
+    # FIFO streaming: 100 Hz output data rate, stream mode (newest 32 kept)
+    ODR_HZ = 100
+    BW_RATE_100HZ = 0x0A
+    FIFO_STREAM = 0x80
+    FIFO_DEPTH = 32
+    # FIFO_STATUS can report one entry more than FIFO_DEPTH: a full FIFO
+    # plus the sample waiting in the output data registers
+    FIFO_MAX_ENTRIES = FIFO_DEPTH + 1
 
+    def __init__(self, spi, cs):
         self.spi = spi
         self.cs = cs
-        self.oled_width = oled_width
-        self.oled_height = oled_height
 
-        self.text_x = self.oled_width / 4
-        self.text_y = self.oled_height / 4
-        self.vel_x = 0
-        self.vel_y = 0
+        # Reused SPI buffers (no allocation per sample). The X/Y/Z read is
+        # one full-duplex transfer: command byte + 6 dummy bytes out, the
+        # data arrives in rx[1:7].
+        self._accel_cmd = bytes([self.SPI_READ | self.SPI_MULTI_BYTE | self.DATAX0])
+        self._accel_tx = bytes(self._accel_cmd + bytes(6))
+        self._accel_rx = bytearray(7)
+        self._status_rx = bytearray(1)
+        self._reg_tx = bytearray(2)    # Register write: address, value
+        self._cmd_tx = bytearray(1)    # Command byte of a register read
+
+        # FIFO drain buffer: raw interleaved X, Y, Z counts. The per-entry
+        # views are sliced once here, so read_fifo_raw() (timer callback)
+        # allocates nothing
+        self.fifo_raw = array.array('h', [0] * (3 * self.FIFO_MAX_ENTRIES))
+        fifo_mv = memoryview(self.fifo_raw)
+        self._fifo_entries = tuple(fifo_mv[3 * k:3 * k + 3]
+                                   for k in range(self.FIFO_MAX_ENTRIES))
 
         self._initialize_adxl345()
 
     def _write_reg(self, reg, value):
+        tx = self._reg_tx
+        tx[0] = reg
+        tx[1] = value
         self.cs.value(0)
-        self.spi.write(bytearray([reg, value]))
+        self.spi.write(tx)
         self.cs.value(1)
 
-    def _read_regs(self, reg, n_bytes):
+    def _read_regs(self, reg, buf):
+        """Burst-read len(buf) registers starting at reg into buf."""
+        self._cmd_tx[0] = self.SPI_READ | self.SPI_MULTI_BYTE | reg
         self.cs.value(0)
-        cmd = self.SPI_READ | self.SPI_MULTI_BYTE | reg
-        self.spi.write(bytearray([cmd]))
-        buf = bytearray(n_bytes)
+        self.spi.write(self._cmd_tx)
         self.spi.readinto(buf)
         self.cs.value(1)
         return buf
@@ -87,50 +123,48 @@ class PhysicsEngine:
             raise RuntimeError("ADXL345 not found!")
 
         print("ADXL345 detected. Initializing...")
+        self._write_reg(self.BW_RATE, self.BW_RATE_100HZ)
+        self._write_reg(self.FIFO_CTL, self.FIFO_STREAM)
         self._write_reg(self.POWER_CTL, 0x08)
 
     def get_accel_data(self):
-        data = self._read_regs(self.DATAX0, 6)
-        x_raw = (data[1] << 8) | data[0]
-        y_raw = (data[3] << 8) | data[2]
-        z_raw = (data[5] << 8) | data[4]
-        if x_raw & (1 << 15): x_raw -= (1 << 16)
-        if y_raw & (1 << 15): y_raw -= (1 << 16)
-        if z_raw & (1 << 15): z_raw -= (1 << 16)
-
-        x_g = x_raw * self.SCALE_FACTOR
-        y_g = y_raw * self.SCALE_FACTOR
-        z_g = z_raw * self.SCALE_FACTOR
-
-        return x_g, y_g, z_g
-
-    def update_position(self):
-        if self.disable:
-            return
-
-        x_g, y_g, _ = self.get_accel_data()
-
-        self.vel_x += x_g * self.ACCEL_SENSITIVITY
-        self.vel_y += y_g * self.ACCEL_SENSITIVITY
-        self.vel_x *= self.DAMPING
-        self.vel_y *= self.DAMPING
-        self.text_x -= self.vel_x
-        self.text_y += self.vel_y
-
-        # Wrap around strategy
-        if self.text_x > self.oled_width:
-            self.text_x = -self.TEXT_BLOCK_WIDTH
-        elif self.text_x + self.TEXT_BLOCK_WIDTH < 0:
-            self.text_x = self.oled_width
-        if self.text_y > self.oled_height:
-            self.text_y = -self.TEXT_BLOCK_HEIGHT
-        elif self.text_y + self.TEXT_BLOCK_HEIGHT < 0:
-            self.text_y = self.oled_height
-
-    def disable_physics(self):
-        self.disable = True
-        self.text_x = self.oled_width / 4
-        self.text_y = self.oled_height / 4
+        # Hot path: a single 7-byte write_readinto into the cached buffers
+        self.cs.value(0)
+        self.spi.write_readinto(self._accel_tx, self._accel_rx)
+        self.cs.value(1)
+        # Signed little-endian 16-bit X/Y/Z decoded in one C call
+        x_raw, y_raw, z_raw = struct.unpack_from('<hhh', self._accel_rx, 1)
+
+        sf = self.SCALE_FACTOR
+        return x_raw * sf, y_raw * sf, z_raw * sf
+
+    def read_fifo_raw(self):
+        """
+        Drain the hardware FIFO into self.fifo_raw (array('h') of
+        3 * FIFO_MAX_ENTRIES) as raw interleaved X, Y, Z counts, oldest
+        first. Returns the number of samples read.
+
+        Each 6-byte data read pops one FIFO entry (a longer burst would run
+        on into the next registers), so entries are read one by one, but
+        all pending ones in a single call. The registers hold little-endian
+        int16 words, the ESP32's own layout, so each entry is read straight
+        into fifo_raw's memory: no unpacking or sign extension at all. (A single
+        write_readinto would put the command's dummy byte in front and
+        misalign the words, so this path keeps write + readinto.)
+        """
+        n = min(self._read_regs(self.FIFO_STATUS, self._status_rx)[0] & 0x3F,
+                self.FIFO_MAX_ENTRIES)
+        entries = self._fifo_entries
+        cmd = self._accel_cmd
+        cs = self.cs
+        spi = self.spi
+        for k in range(n):
+            cs.value(0)
+            spi.write(cmd)
+            spi.readinto(entries[k])
+            cs.value(1)
+        return n
+
 
 class HardwareManager:
     def __init__(self):
@@ -142,7 +176,7 @@ class HardwareManager:
         # self.OLED_HEIGHT = 32
 
         # --- SPI and ADXL345 ---
-        self.spi = SPI(1, baudrate=5000000, polarity=1, phase=1, sck=Pin(5), mosi=Pin(19), miso=Pin(21))
+        self.spi = SPI(1, baudrate=5000000, polarity=1, phase=1, firstbit=SPI.MSB, sck=Pin(5), mosi=Pin(19), miso=Pin(21))
         self.cs = Pin(15, Pin.OUT, value=1)
 
         # # --- RTC ---
@@ -167,7 +201,7 @@ class HardwareManager:
 
 # ===== Hardware Initialization =====
 hw = HardwareManager()
-sensor = PhysicsEngine(hw.spi, hw.cs, OLED_WIDTH, OLED_HEIGHT)
+sensor = ADXL345(hw.spi, hw.cs)
 time.sleep(1)
 
 # ===== WiFi Configuration =====
@@ -179,6 +213,10 @@ def connect_wifi():
     """Connects the device to WiFi."""
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
+    # Keep the radio awake: with modem sleep each request burst waits for
+    # the next DTIM beacon (100-300 ms). Costs tens of mA, fine for a
+    # bench demo on USB power.
+    wlan.config(pm=wlan.PM_NONE)
     wlan.connect(WIFI_SSID)
     while not wlan.isconnected():
         show_text("WiFi Connecting")
@@ -186,99 +224,370 @@ def connect_wifi():
     show_text("WiFi OK")
     print("WiFi Connected:", wlan.ifconfig())
 
+def disable_bluetooth():
+    """Make sure BLE is off so it does not share the radio with WiFi."""
+    try:
+        import bluetooth
+    except ImportError:
+        return
+    bluetooth.BLE().active(False)
+
+
+disable_bluetooth()
 connect_wifi()
 time.sleep(1)
 
 # ===== HAR Service Configuration =====
 # IMPORTANT: Use the IP address of the machine running your Flask server
 SERVER_IP = "136.115.219.129"  # <-- Change to your PC's IP address
-SERVER_PORT = 9999
-BASE_URL = f"http://{SERVER_IP}:{SERVER_PORT}"
-ACCEL_API_URL = f"{BASE_URL}/api/accelerometer"
-PREDICT_API_URL = f"{BASE_URL}/api/har_predict"
-# PREDICT_API_URL = f"{BASE_URL}/api/har_predict_torch"
+SERVER_PORT = const(9999)
+# POST a window here; the response body carries the prediction:
+# {"success": true, "prediction": {"label": ...}}
+ACCEL_API_PATH = "/api/accelerometer"
+# Model inference happens inside the POST, so allow it more than a plain upload
+PREDICT_TIMEOUT_S = const(45)
+RESULT_HOLD_S = const(2)      # Time a result stays on screen
+MAX_BACKOFF_S = const(30)     # Upper bound of the pause after failed requests
+
+
+# ===== Keep-alive HTTP session =====
+class HttpSession:
+    """
+    Minimal async HTTP/1.1 client that keeps one TCP connection to the
+    server open across windows, instead of a new connection per request.
+    Reconnects (and retries the request once) when the server closed it.
+    All socket waits yield to the other tasks.
+    The encoded request head is kept and reused while method, path,
+    content type and body length stay the same (every window POST).
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self._head_key = None     # (method, path, content_type, length) of _head
+        self._head = b""          # Encoded request line + headers + blank line
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except OSError:
+                pass
+        self.reader = None
+        self.writer = None
+
+    async def _exchange(self, method, path, body, content_type):
+        reader = self.reader
+        writer = self.writer
+        length = -1 if body is None else len(body)
+        key = (method, path, content_type, length)
+        if key != self._head_key:
+            head = "%s %s HTTP/1.1\r\nHost: %s:%d\r\nConnection: keep-alive\r\n" % (
+                method, path, self.host, self.port)
+            if body is not None:
+                head += "Content-Type: %s\r\nContent-Length: %d\r\n" % (content_type, length)
+            self._head = (head + "\r\n").encode()
+            self._head_key = key
+        writer.write(self._head)
+        if body is not None:
+            writer.write(body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise OSError("connection closed by server")
+        status = int(status_line.split(None, 2)[1])
+        keep_alive = status_line.startswith(b"HTTP/1.1")
+        length = None
+        while True:
+            line = await reader.readline()
+            if not line or line == b"\r\n":
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"connection":
+                keep_alive = value.strip().lower() == b"keep-alive"
+
+        if length is None:
+            # No length: the body runs until the server closes
+            data = await reader.read(-1)
+            keep_alive = False
+        else:
+            data = await reader.readexactly(length)
+        if not keep_alive:
+            self.close()
+        return status, data
+
+    async def request(self, method, path, body=None,
+                      content_type="application/octet-stream", timeout=5):
+        """Send one request and return (status, body bytes)."""
+        for attempt in range(2):
+            reused = self.writer is not None
+            try:
+                if not reused:
+                    await asyncio.wait_for_ms(self._connect(), timeout * 1000)
+                return await asyncio.wait_for_ms(
+                    self._exchange(method, path, body, content_type), timeout * 1000)
+            except (OSError, EOFError, asyncio.TimeoutError):
+                self.close()
+                # A stale keep-alive connection gets one fresh retry
+                if attempt or not reused:
+                    raise
+
+    async def post(self, path, body, content_type="application/octet-stream", timeout=5):
+        return await self.request("POST", path, body, content_type, timeout)
+
+    async def get(self, path, timeout=5):
+        return await self.request("GET", path, timeout=timeout)
+
+
+session = HttpSession(SERVER_IP, SERVER_PORT)
 
 
 # ===== HAR Parameters =====
-SAMPLING_FREQ_HZ = 20  # 20 Hz sampling rate
-WINDOW_SIZE = 128  # We need 128 points to trigger a prediction
+SAMPLING_FREQ_HZ = const(20)  # 20 Hz sampling rate
+WINDOW_SIZE = const(128)  # We need 128 points to trigger a prediction
+
+# Each sample is packed as three little-endian float32 (x, y, z); the
+# server reads the body back with np.frombuffer(body, '<f4').reshape(-1, 3)
+SAMPLE_FORMAT = '<fff'
+SAMPLE_BYTES = const(12)
 
 show_text("HAR Ready", f"Win: {WINDOW_SIZE}pts", f"Freq: {SAMPLING_FREQ_HZ}Hz")
 time.sleep(2)
 
-data_window = []
+# Preallocated window buffer, filled in place (no per-sample dicts)
+window_buf = bytearray(WINDOW_SIZE * SAMPLE_BYTES)
+
+# ===== Timer-driven sampling =====
+# The ADXL345 samples at ODR_HZ into its own FIFO. A hardware timer drains
+# the FIFO every FIFO_POLL_MS and averages each DECIMATION samples into one
+# SAMPLING_FREQ_HZ sample in a ring buffer (one array per axis), so
+# sampling keeps its cadence while the main loop waits on the network or
+# draws the OLED.
+DECIMATION = ADXL345.ODR_HZ // SAMPLING_FREQ_HZ   # 100 Hz -> 20 Hz
+FIFO_POLL_MS = const(100)  # ~10 entries per drain; the 32-entry FIFO holds 320 ms
 
-# ===== Main Application Loop =====
-while True:
-    # 1. Read data from the accelerometer
+x_ring = array.array('f', [0.0] * WINDOW_SIZE)
+y_ring = array.array('f', [0.0] * WINDOW_SIZE)
+z_ring = array.array('f', [0.0] * WINDOW_SIZE)
+ring_idx = 0      # Next write position (oldest sample once the ring is full)
+new_samples = 0   # Samples stored since the last window was taken
+
+# Set from the timer callback when a full window is ready (safe outside
+# the event loop, unlike asyncio.Event)
+window_ready = asyncio.ThreadSafeFlag()
+
+fifo_raw = sensor.fifo_raw
+acc_x = acc_y = acc_z = 0   # Running sums of the current decimation group
+acc_n = 0
+
+
+def sample_tick(timer):
+    """Timer callback: drain the accelerometer FIFO into the ring."""
+    global ring_idx, new_samples, acc_x, acc_y, acc_z, acc_n
     try:
-        ax, ay, az = sensor.get_accel_data()
+        n = sensor.read_fifo_raw()
     except Exception as e:
         print(f"ERROR: Failed to read from sensor: {e}")
-        time.sleep(1)
-        continue  # Skip this loop iteration
-    # 2. Construct the JSON payload for a single data point
-
-    point = {
-        "x": ax,
-        "y": ay,
-        "z": az
-    }
-
-    data_window.append(point)
-
-    points_collected = len(data_window)
-    print(f"INFO: Collected point {points_collected}/{WINDOW_SIZE}")
-    show_text("Collecting...", f"Pts: {points_collected}/{WINDOW_SIZE}")
-
-    # 4. Check if a full window of data has been sent
-    if points_collected >= WINDOW_SIZE:
-        print("INFO: Full window collected. Sending data and triggering prediction...")
-        show_text("Streaming...", f"{WINDOW_SIZE} Pts")
-        # 4. Prepare the payload for the entire window.
-        payload = {
-            "data": data_window
-        }
-        # 3. Stream the data point to the server
-        try:
-            # We don't need to check the response for every point to save time.
-            # A timeout is set to prevent the loop from blocking.
-            urequests.post(ACCEL_API_URL, json=payload, timeout=5)
-            print(f"INFO: Sent point ")
-            data_window = []  # Clear the window after sending
-
-        except Exception as e:
-            print(f"ERROR: Failed to send data point: {e}")
-            show_text("Net Fail", "Data Send")
-            time.sleep(1)  # Wait before retrying
-
-        print("INFO: Full window sent. Triggering prediction...")
+        return
+    scale = ADXL345.SCALE_FACTOR / DECIMATION
+    o = 0
+    for _ in range(n):
+        acc_x += fifo_raw[o]
+        acc_y += fifo_raw[o + 1]
+        acc_z += fifo_raw[o + 2]
+        o += 3
+        acc_n += 1
+        if acc_n == DECIMATION:
+            i = ring_idx
+            x_ring[i] = acc_x * scale
+            y_ring[i] = acc_y * scale
+            z_ring[i] = acc_z * scale
+            ring_idx = (i + 1) % WINDOW_SIZE
+            new_samples += 1
+            if new_samples == WINDOW_SIZE:
+                window_ready.set()
+            acc_x = acc_y = acc_z = 0
+            acc_n = 0
+
+
+def take_window():
+    """
+    Pack the last WINDOW_SIZE samples, oldest first, into window_buf
+    (per-axis rings to interleaved x, y, z only here, at the wire).
+
+    Returns a cheap summary of the window for the prediction cache:
+    (mean_x, mean_y, mean_z, var_x, var_y, var_z, max |delta| between
+    consecutive samples on any axis), all in g / g^2.
+    """
+    global new_samples
+    sx = sy = sz = 0.0
+    qx = qy = qz = 0.0
+    dmax = 0.0
+    # Only the ring position is taken with IRQs off; the copy below runs
+    # with the timer live. A tick landing mid-copy can overwrite the oldest
+    # slot or two with newer samples, which the classifier tolerates.
+    irq_state = machine.disable_irq()
+    start = ring_idx
+    new_samples = 0
+    machine.enable_irq(irq_state)
+
+    px = x_ring[start]
+    py = y_ring[start]
+    pz = z_ring[start]
+    for k in range(WINDOW_SIZE):
+        i = (start + k) % WINDOW_SIZE
+        x = x_ring[i]
+        y = y_ring[i]
+        z = z_ring[i]
+        struct.pack_into(SAMPLE_FORMAT, window_buf, k * SAMPLE_BYTES, x, y, z)
+        sx += x
+        sy += y
+        sz += z
+        qx += x * x
+        qy += y * y
+        qz += z * z
+        d = max(abs(x - px), abs(y - py), abs(z - pz))
+        if d > dmax:
+            dmax = d
+        px = x
+        py = y
+        pz = z
+
+    mx = sx / WINDOW_SIZE
+    my = sy / WINDOW_SIZE
+    mz = sz / WINDOW_SIZE
+    return (mx, my, mz,
+            qx / WINDOW_SIZE - mx * mx,
+            qy / WINDOW_SIZE - my * my,
+            qz / WINDOW_SIZE - mz * mz,
+            dmax)
+
+
+# ===== Prediction cache for static windows =====
+# While the wearer is still (sitting, lying, sleeping) consecutive windows
+# look the same; if a window's summary is within these tolerances of the
+# last predicted one, its label is reused without a server round trip.
+STATIC_MEAN_EPS = 0.1      # g, per-axis mean (posture / orientation)
+STATIC_VAR_EPS = 0.002     # g^2, per-axis variance
+STATIC_DELTA_EPS = 0.05    # g, largest sample-to-sample change
+MAX_CACHED_WINDOWS = const(10)  # Ask the server again after this many reuses
+
+last_stats = None    # Summary of the last window the server labelled
+last_label = None    # Its label
+cached_windows = 0   # Consecutive windows answered from the cache
+
+
+def matches_last_window(stats):
+    """True if stats is close enough to last_stats to reuse last_label."""
+    if last_stats is None or cached_windows >= MAX_CACHED_WINDOWS:
+        return False
+    for k in range(3):
+        if abs(stats[k] - last_stats[k]) >= STATIC_MEAN_EPS:
+            return False
+        if abs(stats[3 + k] - last_stats[3 + k]) >= STATIC_VAR_EPS:
+            return False
+    return abs(stats[6] - last_stats[6]) < STATIC_DELTA_EPS
+
+
+sample_timer = Timer(0)
+sample_timer.init(period=FIFO_POLL_MS, mode=Timer.PERIODIC, callback=sample_tick)
+
+# True while the network task owns the display (request / result)
+display_busy = False
+
+
+# ===== Tasks =====
+# Progress lines built once at startup, indexed by point count, so the
+# per-sample update formats and allocates nothing
+PROGRESS_LINES = tuple("Pts: %d/%d" % (n, WINDOW_SIZE) for n in range(WINDOW_SIZE + 1))
+
+
+async def display_task():
+    """Show window progress whenever the sample count changes."""
+    shown_points = -1
+    while True:
+        points_collected = min(new_samples, WINDOW_SIZE)
+        if not display_busy and points_collected != shown_points:
+            shown_points = points_collected
+            line = PROGRESS_LINES[points_collected]
+            print("INFO: Collected point", line)
+            show_text("Collecting...", line)
+        await asyncio.sleep_ms(1000 // SAMPLING_FREQ_HZ)
+
+
+async def predict_task():
+    """Wait for each full window and get its activity label."""
+    global display_busy, last_stats, last_label, cached_windows
+    pause_s = RESULT_HOLD_S
+    while True:
+        # 1. Wait until the timer has collected a full window of new samples
+        await window_ready.wait()
+
+        # 2. Full window collected: snapshot it (sampling carries on meanwhile)
+        stats = take_window()
+        # One collection per window keeps the heap from fragmenting
+        gc.collect()
+
+        # 3. Nothing changed since the last prediction: reuse its label
+        if matches_last_window(stats):
+            cached_windows += 1
+            print(f"INFO: Static window, reusing activity: {last_label}")
+            show_text("Activity:", f"-> {last_label.upper()}")
+            continue
+
+        display_busy = True
+        print("INFO: Full window collected. Sending data for prediction...")
         show_text("Requesting...", "Prediction")
 
+        # 4. Send the entire window as raw bytes; one round trip returns
+        #    the prediction as well
         try:
-            # 5. Call the prediction API
-            res = urequests.get(PREDICT_API_URL, timeout=45)
-            result_json = res.json()
-            res.close()
+            _, body = await session.post(ACCEL_API_PATH, window_buf, timeout=PREDICT_TIMEOUT_S)
+            print(f"INFO: Sent window ")
+            result_json = json.loads(body)
 
-            # 6. Parse the response and display the result
+            # 5. Parse the response and display the result
             if result_json.get("success"):
                 activity = result_json.get("prediction", {}).get("label", "UNKNOWN")
                 print(f"SUCCESS: Predicted Activity: {activity}")
                 show_text("Activity:", f"-> {activity.upper()}")
+                last_stats = stats
+                last_label = activity
+                cached_windows = 0
             else:
                 error_msg = result_json.get("error", {}).get("code", "API_ERROR")
                 print(f"ERROR: API returned an error: {error_msg}")
                 show_text("API Error", error_msg)
+            pause_s = RESULT_HOLD_S
 
         except Exception as e:
-            print(f"ERROR: Failed to get prediction: {e}")
-            show_text("Net Fail", "Predict GET")
+            # Drop the connection (it may be mid-response) and back off
+            # exponentially so an outage is not hammered every window
+            session.close()
+            print(f"ERROR: Failed to get prediction: {e} (retry in {pause_s}s)")
+            show_text("Net Fail", "Predict", f"Retry in {pause_s}s")
+            await asyncio.sleep(pause_s)
+            pause_s = min(pause_s * 2, MAX_BACKOFF_S)
+            display_busy = False
+            continue
+
+        # 6. Keep the result on screen for a moment; the timer keeps sampling
+        await asyncio.sleep(RESULT_HOLD_S)
+        display_busy = False
+
+
+async def main():
+    asyncio.create_task(display_task())
+    await predict_task()
 
-        # 7. Reset the counter and wait before starting the next window
-        print("INFO: Resetting window counter.")
-        points_sent_in_window = 0
-        time.sleep(2)  # Pause to display the result on the screen
 
-    # 8. Control the sampling frequency
-    time.sleep(1.0 / SAMPLING_FREQ_HZ)
+asyncio.run(main())
@@ -32,7 +32,7 @@ tca_select(i2c, 1)
 def configure_sensor():
     """
     Setup the HDC1080 sensor by writing to its configuration register.
-    - Bit 12 = 1: continuous mode (temperature followed by humidity)
+    - Bit 12 = 1: sequential mode (one trigger converts temperature, then humidity)
     - Bit 10 = 0: temp measurement resolution is 14 bits
     - Bit 9:8 = 00: humidity measurement resolution is 14 bits
     """
@@ -43,20 +43,40 @@ def configure_sensor():
     time.sleep_ms(15)
 
 
-def read_temperature_humidity():
+# 14 位温湿度转换约需 13ms，留 20ms 余量
+CONV_MS = 20
+_t_ready = time.ticks_ms()     # 当前这次转换结果可读的时刻
+_buf4 = bytearray(4)           # 复用的接收缓冲区：温度 2 字节 + 湿度 2 字节
+
+
+def start_measurement():
     """
-    从 HDC1080 读取温度和湿度数据。
+    触发一次温湿度测量（不等待）。
+    HDC1080 没有自由运行模式，每次转换都需要写一次温度寄存器地址来触发。
     """
-    # 1. 触发一次测量
-    # 向传感器的温度寄存器地址写入一个空字节，以启动温湿度测量序列
+    global _t_ready
     i2c.writeto(HDC1080_ADDR, b'\x00')
+    _t_ready = time.ticks_add(time.ticks_ms(), CONV_MS)
+
 
-    # 2. 等待测量完成 (14位分辨率需要约 13ms，我们等待 20ms 以确保稳定)
-    time.sleep_ms(20)
+def read_temperature_humidity():
+    """
+    从 HDC1080 读取温度和湿度数据。
+    读取的是上一次 start_measurement() 触发的结果，读完立即触发下一次测量，
+    这样转换时间和两次读取之间的间隔重叠，正常循环里不再需要等待。
+    """
+    # 1. 只有在距离触发不足 CONV_MS 时才等待剩余的时间
+    remaining = time.ticks_diff(_t_ready, time.ticks_ms())
+    if remaining > 0:
+        time.sleep_ms(remaining)
 
-    # 3. 读取 4 个字节的数据
+    # 2. 读取 4 个字节的数据
     # 前 2 个字节是温度，后 2 个字节是湿度
-    data = i2c.readfrom(HDC1080_ADDR, 4)
+    data = _buf4
+    i2c.readfrom_into(HDC1080_ADDR, data)
+
+    # 3. 触发下一次测量，结果在下次调用时读取
+    start_measurement()
 
     # 4. 组合数据并将原始数据转换为实际值
     # 将两个字节（8位）合并成一个 16 位整数
@@ -79,6 +99,7 @@ try:
 
         # 配置传感器
         configure_sensor()
+        start_measurement()
 
         # 循环读取并打印数据
         while True:
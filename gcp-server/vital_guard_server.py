@@ -8,6 +8,7 @@ from typing import List
 
 import numpy as np
 from flask import Flask, request, jsonify, send_from_directory
+from werkzeug.serving import WSGIRequestHandler
 
 from vitalguard import (VitalSignsDataPoint, SharedDataStore,
                         DataValidator, VitalSignsAnalyzer,
@@ -119,7 +120,7 @@ def create_flask_app(data_store: SharedDataStore,
 
             # ===== Batch Data Processing (Recommended). =====
             if 'data' in request_data and 'batch_info' in request_data:
-                is_valid, error_msg = DataValidator.validate_batch_request(request_data)
+                is_valid, error_msg, data_points_raw = DataValidator.validate_batch_request(request_data)
                 if not is_valid:
                     return jsonify({
                         "success": False,
@@ -132,7 +133,8 @@ def create_flask_app(data_store: SharedDataStore,
                 # Parsing batch data.
                 device_id = request_data['device_id']
                 batch_info = request_data['batch_info']
-                data_points_raw = request_data['data']
+                # data_points_raw: plain points, compact encodings (e.g.
+                # delta-v1) already expanded by the validator
                 data_points: List[VitalSignsDataPoint] = []
                 parsing_errors: List[str] = []
                 for idx, point in enumerate(data_points_raw):
@@ -426,7 +428,9 @@ def main():
     print(f"🔗 Access Web UI at: http://{FLASK_HOST}:{FLASK_PORT}/ui")
     print("\nPress Ctrl+C to stop the server\n")
     try:
-        # Use Flask built-in server for development
+        # Use Flask built-in server for development.
+        # HTTP/1.1 lets the ESP32 keep one connection open across batches.
+        WSGIRequestHandler.protocol_version = "HTTP/1.1"
         app.run(host=FLASK_HOST, port=FLASK_PORT, debug=False, threaded=True)
     except KeyboardInterrupt:
         print("\n⚠️  Received shutdown signal")
@@ -6,6 +6,7 @@ Core backend package for VitalGuard AI.
 from .models import VitalSignsDataPoint
 from .storage import SharedDataStore
 from .validation import DataValidator
+from .decoding import BatchDecoder
 from .ml_analyzer import VitalSignsAnalyzer
 from .llm_service import HealthReportService
 from .llm_interface import OpenAI_LLM
@@ -14,6 +15,7 @@ __all__ = [
     "VitalSignsDataPoint",
     "SharedDataStore",
     "DataValidator",
+    "BatchDecoder",
     "VitalSignsAnalyzer",
     "HealthReportService",
     "OpenAI_LLM"
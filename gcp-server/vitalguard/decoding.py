@@ -0,0 +1,170 @@
+# vitalguard/decoding.py
+from itertools import accumulate
+from typing import Dict, Any, List, Tuple
+
+
+class BatchDecoder:
+    """Batch Decoder: Expands compact ESP32 batch encodings into plain data points."""
+
+    PLAIN = "plain"
+    DELTA_V1 = "delta-v1"
+    COLUMNAR_V1 = "columnar-v1"
+    COLUMNAR_V2 = "columnar-v2"
+    COLUMNAR_V3 = "columnar-v3"
+    SUPPORTED_ENCODINGS = (PLAIN, DELTA_V1, COLUMNAR_V1, COLUMNAR_V2, COLUMNAR_V3)
+
+    # columnar channels; the integer ones are sent as differences
+    COLUMNAR_FIELDS = ('cycle', 'timestamp', 'ir', 'red', 'heartrate', 'spo2',
+                       'temperature', 'humidity', 'force', 'ax', 'ay', 'az')
+    COLUMNAR_DELTA_FIELDS = ('cycle', 'timestamp', 'ir', 'red', 'force', 'ax', 'ay', 'az')
+    # columnar-v2 additionally sends these as integer tenths, delta coded
+    COLUMNAR_DECI_FIELDS = ('temperature', 'humidity')
+    # columnar-v3 sends raw HDC1080 codes (delta coded) in place of these
+    COLUMNAR_RAW_FIELDS = {'temperature_raw': 'temperature', 'humidity_raw': 'humidity'}
+
+    @staticmethod
+    def get_encoding(data: Dict[str, Any]) -> str:
+        """Return the batch encoding declared in batch_info (default: plain)."""
+        return data.get('batch_info', {}).get('encoding', BatchDecoder.PLAIN)
+
+    @staticmethod
+    def decode_points(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Return the batch 'data' array as plain data points
+        ({cycle, timestamp, vital_signs: {...}}), whatever the encoding.
+        """
+        encoding = BatchDecoder.get_encoding(data)
+        if encoding == BatchDecoder.DELTA_V1:
+            return BatchDecoder._expand_delta_v1(data['data'])
+        if encoding == BatchDecoder.COLUMNAR_V1:
+            return BatchDecoder._expand_columnar(data['data'])
+        if encoding == BatchDecoder.COLUMNAR_V2:
+            return BatchDecoder._expand_columnar(data['data'],
+                                                 BatchDecoder.COLUMNAR_DECI_FIELDS)
+        if encoding == BatchDecoder.COLUMNAR_V3:
+            return BatchDecoder._expand_columnar(BatchDecoder._convert_hdc1080_columns(data['data']))
+        return data['data']
+
+    @staticmethod
+    def _expand_delta_v1(points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        delta-v1: the first point is a plain data point; every following
+        point carries d_* differences for the integer channels (cycle,
+        timestamp, ir, red, force, accel) and absolute float channels.
+        Absolute values are rebuilt with a running sum.
+        """
+        first = points[0]
+        vital_signs = first['vital_signs']
+        ppg = vital_signs['ppg']
+        accel = vital_signs.get('accel', {}) or {}
+
+        cycle = first['cycle']
+        timestamp = int(first['timestamp'])
+        ir = ppg.get('ir', 0)
+        red = ppg.get('red', 0)
+        force = vital_signs.get('force', 0)
+        ax = accel.get('ax', 0)
+        ay = accel.get('ay', 0)
+        az = accel.get('az', 0)
+
+        expanded = [first]
+        for delta in points[1:]:
+            cycle += delta.get('d_cycle', 1)
+            timestamp += delta.get('d_ts', 0)
+            ir += delta.get('d_ir', 0)
+            red += delta.get('d_red', 0)
+            force += delta.get('d_force', 0)
+            ax += delta.get('d_ax', 0)
+            ay += delta.get('d_ay', 0)
+            az += delta.get('d_az', 0)
+
+            expanded.append({
+                'cycle': cycle,
+                'timestamp': timestamp,
+                'vital_signs': {
+                    'ppg': {
+                        'ir': ir,
+                        'red': red,
+                        'heartrate': delta.get('heartrate'),
+                        'spo2': delta.get('spo2')
+                    },
+                    'temperature': delta.get('temperature', 0.0),
+                    'humidity': delta.get('humidity', 0.0),
+                    'force': force,
+                    'accel': {
+                        'ax': ax,
+                        'ay': ay,
+                        'az': az
+                    }
+                }
+            })
+
+        return expanded
+
+    @staticmethod
+    def hdc1080_temperature(raw: int) -> float:
+        """HDC1080 temperature code to degC: raw / 2^16 * 165 - 40."""
+        return round(raw / 65536.0 * 165.0 - 40.0, 2)
+
+    @staticmethod
+    def hdc1080_humidity(raw: int) -> float:
+        """HDC1080 humidity code to %RH: raw / 2^16 * 100."""
+        return round(raw / 65536.0 * 100.0, 2)
+
+    @staticmethod
+    def _convert_hdc1080_columns(columns: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """
+        columnar-v3: replace the delta-coded temperature_raw / humidity_raw
+        columns with absolute temperature (degC) / humidity (%RH) columns.
+        """
+        columns = dict(columns)
+        for raw_field, field in BatchDecoder.COLUMNAR_RAW_FIELDS.items():
+            convert = (BatchDecoder.hdc1080_temperature if field == 'temperature'
+                       else BatchDecoder.hdc1080_humidity)
+            columns[field] = [convert(raw) for raw in accumulate(columns.pop(raw_field))]
+        return columns
+
+    @staticmethod
+    def _expand_columnar(columns: Dict[str, List[Any]],
+                         deci_fields: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+        """
+        columnar-v1/v2: 'data' is an object with one array per channel.
+        Integer channels hold the first value followed by differences to the
+        previous value; float channels hold absolute values. deci_fields
+        (columnar-v2: temperature, humidity) are delta-coded integer tenths.
+        """
+        total = len(columns['cycle'])
+        values = {}
+        for field in BatchDecoder.COLUMNAR_FIELDS:
+            column = columns[field]
+            if len(column) != total:
+                raise ValueError(f"Column '{field}' has {len(column)} values, expected {total}")
+            if field in deci_fields:
+                column = [round(v / 10.0, 1) for v in accumulate(column)]
+            elif field in BatchDecoder.COLUMNAR_DELTA_FIELDS:
+                column = list(accumulate(column))
+            values[field] = column
+
+        return [
+            {
+                'cycle': values['cycle'][i],
+                'timestamp': values['timestamp'][i],
+                'vital_signs': {
+                    'ppg': {
+                        'ir': values['ir'][i],
+                        'red': values['red'][i],
+                        'heartrate': values['heartrate'][i],
+                        'spo2': values['spo2'][i]
+                    },
+                    'temperature': values['temperature'][i],
+                    'humidity': values['humidity'][i],
+                    'force': values['force'][i],
+                    'accel': {
+                        'ax': values['ax'][i],
+                        'ay': values['ay'][i],
+                        'az': values['az'][i]
+                    }
+                }
+            }
+            for i in range(total)
+        ]
@@ -1,5 +1,7 @@
 import json
+import threading
 import time
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 from abc import ABC, abstractmethod
 from openai import OpenAI, OpenAIError
@@ -11,6 +13,19 @@ from openai import OpenAI, OpenAIError
 class LLMInterface(ABC):
     """LLM client abstract base class."""
 
+    # Number of distinct vital-level inputs whose responses are kept
+    RESPONSE_CACHE_SIZE = 128
+    # Status fields that build_health_prompt puts in front of the model
+    # (timestamps and numeric features are left out of the cache key)
+    LEVEL_FIELDS = ("heart_rate_level", "activity_state", "sleep_state",
+                    "temperature_status", "spo2_status")
+
+    def __init__(self):
+        # LRU of LLM responses keyed by the discrete inputs (see _cache_key)
+        self._response_cache: "OrderedDict[str, str]" = OrderedDict()
+        # Flask serves requests on several threads; guards _response_cache
+        self._cache_lock = threading.Lock()
+
     @abstractmethod
     def predict(self, prompt: str) -> str:
         """
@@ -29,68 +44,70 @@ class LLMInterface(ABC):
         - Build a structured LLM prompt from current vitals + history
         - Call predict()
         - Return the LLM raw response (expected JSON)
+
+        Responses are cached by the discrete levels only, so an unchanged
+        status + history reuses the previous response instead of another
+        LLM round trip.
         """
         history = history or []
         user_profile = user_profile or {}
 
+        key = self._cache_key(current_status, history, user_profile)
+        with self._cache_lock:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                self._response_cache.move_to_end(key)
+        if cached is not None:
+            print("INFO: Vital levels unchanged, reusing cached LLM response")
+            return cached
+
         prompt = build_health_prompt(
             current_status=current_status,
             history=history,
             user_profile=user_profile,
         )
-        return self.predict(prompt)
-
-
-def build_health_prompt(
-    current_status: Dict[str, str],
-    history: List[Dict[str, Any]],
-    user_profile: Optional[Dict[str, Any]] = None,
-) -> str:
-    """
-    Build the LLM prompt in English:
-    - Includes current discrete vital levels
-    - Includes recent history (trend reference)
-    - Instructs the assistant to provide:
-        (1) Immediate actionable advice
-        (2) Historical trend analysis
-    - Requires strict JSON output for easy parsing
-    """
+        response = self.predict(prompt)
+
+        with self._cache_lock:
+            self._response_cache[key] = response
+            if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        return response
+
+    @classmethod
+    def _cache_key(
+        cls,
+        current_status: Dict[str, Any],
+        history: List[Dict[str, Any]],
+        user_profile: Dict[str, Any],
+    ) -> str:
+        """Canonical JSON of the discrete levels and the user profile."""
+        def levels(d: Dict[str, Any]) -> List[str]:
+            return [str(d.get(field, "unknown")) for field in cls.LEVEL_FIELDS]
+
+        return json.dumps(
+            [levels(current_status), [levels(item) for item in history], user_profile],
+            sort_keys=True,
+            default=str,
+        )
 
-    # ----------- Safe getters -----------
-    def get_value(d: Dict[str, Any], key: str, default: str = "unknown") -> str:
-        return str(d.get(key, default))
 
-    # Current vitals
-    cur_ts = get_value(current_status, "timestamp", "unknown")
-    cur_hr = get_value(current_status, "heart_rate_level")
-    cur_act = get_value(current_status, "activity_state")
-    cur_sleep = get_value(current_status, "sleep_state")
-    cur_temp = get_value(current_status, "temperature_status")
-    cur_spo2 = get_value(current_status, "spo2_status")
+class _StatusFields(dict):
+    """format_map() mapping that renders missing status fields as 'unknown'."""
 
-    # Format history
-    history_lines = []
-    for idx, item in enumerate(history):
-        line = (
-            f"{idx + 1}. "
-            f"time={get_value(item, 'timestamp')}, "
-            f"HR={get_value(item, 'heart_rate_level')}, "
-            f"Activity={get_value(item, 'activity_state')}, "
-            f"Sleep={get_value(item, 'sleep_state')}, "
-            f"Temp={get_value(item, 'temperature_status')}, "
-            f"SpO2={get_value(item, 'spo2_status')}"
-        )
-        history_lines.append(line)
+    def __missing__(self, key: str) -> str:
+        return "unknown"
 
-    history_block = "\n".join(history_lines) if history_lines else "No historical records available."
 
-    # Optional user profile
-    profile_block = "No additional user profile provided."
-    if user_profile:
-        profile_block = json.dumps(user_profile, ensure_ascii=False)
+# One line per history item; filled with format_map(_StatusFields(...))
+_HISTORY_LINE = (
+    "{index}. time={timestamp}, HR={heart_rate_level}, Activity={activity_state}, "
+    "Sleep={sleep_state}, Temp={temperature_status}, SpO2={spo2_status}"
+)
 
-    # ----------- FINAL LLM PROMPT (ALL ENGLISH VERSION) -----------
-    prompt = f"""
+# ----------- FINAL LLM PROMPT (ALL ENGLISH VERSION) -----------
+# Module-level template, so build_health_prompt only substitutes the fields
+_PROMPT_TEMPLATE = """
 You are VitalGuard, a conservative, safety-oriented health monitoring assistant running on a wearable device.
 You do NOT provide medical diagnoses and you do NOT reference diseases.  
 You receive *discretized vital-sign levels* (not raw medical values).  
@@ -104,12 +121,12 @@ Discrete levels you may receive:
 - spo2_status: ["normal", "slightly_low", "low"]
 
 Current vitals (current_status):
-- timestamp        : {cur_ts}
-- heart_rate_level : {cur_hr}
-- activity_state   : {cur_act}
-- sleep_state      : {cur_sleep}
-- temperature_status: {cur_temp}
-- spo2_status      : {cur_spo2}
+- timestamp        : {timestamp}
+- heart_rate_level : {heart_rate_level}
+- activity_state   : {activity_state}
+- sleep_state      : {sleep_state}
+- temperature_status: {temperature_status}
+- spo2_status      : {spo2_status}
 
 Recent history (from oldest to newest):
 {history_block}
@@ -156,8 +173,38 @@ Rules:
 - If several indicators are strongly abnormal (e.g., very_high HR + elevated temperature + low SpO₂), you may raise risk_level and set need_medical_attention = true.
 - Still avoid panic-inducing language.
 
-"""
-    return prompt.strip()
+""".strip()
+
+
+def build_health_prompt(
+    current_status: Dict[str, str],
+    history: List[Dict[str, Any]],
+    user_profile: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build the LLM prompt in English:
+    - Includes current discrete vital levels
+    - Includes recent history (trend reference)
+    - Instructs the assistant to provide:
+        (1) Immediate actionable advice
+        (2) Historical trend analysis
+    - Requires strict JSON output for easy parsing
+    """
+
+    # Format history
+    history_block = "\n".join(
+        _HISTORY_LINE.format_map(_StatusFields(item, index=idx + 1))
+        for idx, item in enumerate(history)
+    ) or "No historical records available."
+
+    # Optional user profile
+    profile_block = "No additional user profile provided."
+    if user_profile:
+        profile_block = json.dumps(user_profile, ensure_ascii=False)
+
+    return _PROMPT_TEMPLATE.format_map(
+        _StatusFields(current_status, history_block=history_block, profile_block=profile_block)
+    )
 
 
 class OpenAI_LLM(LLMInterface):
@@ -172,6 +219,7 @@ class OpenAI_LLM(LLMInterface):
         if api_key.strip() == 'sk-proj-...':
             print("API_KEY is not set. Please replace with your actual key.")
 
+        super().__init__()
         self.model = model
         self.temperature = temperature
         self.timeout = timeout
@@ -201,10 +249,17 @@ class OpenAI_LLM(LLMInterface):
                         {"role": "user", "content": prompt}
                     ],
                     temperature=self.temperature,
-                    timeout=self.timeout
+                    timeout=self.timeout,
+                    stream=True
                 )
+                # Collect the streamed deltas; the first tokens arrive while
+                # the rest is still being generated
+                chunks = []
+                for event in response:
+                    if event.choices and event.choices[0].delta.content:
+                        chunks.append(event.choices[0].delta.content)
                 print("✅ LLM response received")
-                return response.choices[0].message.content.strip()
+                return "".join(chunks).strip()
 
             except OpenAIError as e:
                 last_error = e
@@ -1,7 +1,9 @@
 # vitalguard/llm_service.py
 import json
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, Optional, List
+from urllib3.util.retry import Retry
 
 from .llm_interface import LLMInterface
 from .ml_analyzer import VitalSignsAnalyzer
@@ -22,6 +24,17 @@ class HealthReportService:
         self.analyzer = analyzer
         self.llm = llm_client
         self.ntfy_url = f"https://ntfy.sh/{ntfy_topic}"
+        # One pooled keep-alive session, so each report reuses the TLS
+        # connection to ntfy. Only failed connects are retried: after a read
+        # error ntfy may already have the message, and a retry would send a
+        # duplicate alert
+        self._ntfy_session = requests.Session()
+        self._ntfy_session.mount("https://", HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=1,
+            max_retries=Retry(total=3, connect=3, read=0, status=0, other=0,
+                              backoff_factor=0.2),
+        ))
         print("✅ HealthReportService initialized!")
 
     def _send_ntfy_notification(self, message: str) -> None:
@@ -30,7 +43,7 @@ class HealthReportService:
         This should NEVER raise and break the pipeline.
         """
         try:
-            requests.post(
+            self._ntfy_session.post(
                 self.ntfy_url,
                 data=message.encode("utf-8"),
                 timeout=3,
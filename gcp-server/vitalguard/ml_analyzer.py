@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Dict, Any, Deque, List, Optional
 
 import numpy as np
+from scipy.signal import find_peaks
 
 from .storage import SharedDataStore
 
@@ -14,6 +15,12 @@ class VitalSignsAnalyzer:
     discretized vital-sign levels for LLM consumption.
     """
 
+    # Plausible heart-rate range for the PPG peak detector (BPM)
+    HR_MIN_BPM = 40
+    HR_MAX_BPM = 180
+    # Minimum PPG window length for a heart-rate estimate (seconds)
+    MIN_PPG_SECONDS = 4.0
+
     def __init__(self,
                  data_store: SharedDataStore,
                  window_points: int = 300,
@@ -43,6 +50,7 @@ class VitalSignsAnalyzer:
             raise ValueError("Data window unavailable")
 
         # Extract numeric arrays
+        ir = np.array(raw['ir'], dtype=float)
         hr = np.array(raw['heartrate'], dtype=float)
         spo2 = np.array(raw['spo2'], dtype=float)
         temp = np.array(raw['temperature'], dtype=float)
@@ -51,8 +59,13 @@ class VitalSignsAnalyzer:
         az = np.array(raw['az'], dtype=float)
         timestamps = raw['timestamps']
 
-        # Filter out NaN if any
-        hr_mean = self._safe_mean(hr)
+        # The device sends 0 when it has no HR / SpO2 estimate
+        hr[hr <= 0] = np.nan
+        spo2[spo2 <= 0] = np.nan
+
+        # Prefer HR from the raw IR waveform; fall back to the device values
+        ppg_hr = self._estimate_hr_from_ppg(ir, timestamps)
+        hr_mean = ppg_hr if ppg_hr is not None else self._safe_mean(hr)
         spo2_mean = self._safe_mean(spo2)
         temp_mean = self._safe_mean(temp)
         activity_metric = self._compute_activity_metric(ax, ay, az)
@@ -73,6 +86,7 @@ class VitalSignsAnalyzer:
             # Optional: include numeric features for debugging
             "features": {
                 "hr_mean": hr_mean,
+                "hr_source": "ppg" if ppg_hr is not None else "device",
                 "spo2_mean": spo2_mean,
                 "temp_mean": temp_mean,
                 "activity_metric": activity_metric,
@@ -103,6 +117,71 @@ class VitalSignsAnalyzer:
             return None
         return float(np.nanmean(values))
 
+    @classmethod
+    def _estimate_hr_from_ppg(cls, ir: np.ndarray,
+                              timestamps: List[str]) -> Optional[float]:
+        """
+        Estimate heart rate (BPM) from the raw IR PPG window.
+        The sample rate comes from the timestamps (ms); the signal is
+        detrended with a 1 s moving average, lightly smoothed, and the
+        pulse peaks are found with scipy find_peaks. The beat interval is
+        the median time between peak timestamps.
+        Samples with a non-numeric timestamp (e.g. ISO strings from older
+        rows) or no IR reading (<= 0, sensor dropout) are skipped.
+        Returns None if the window is too short or has no clear pulse.
+        """
+        if len(timestamps) != ir.size:
+            return None
+        t_ms = np.array([cls._to_float(t) for t in timestamps], dtype=float)
+        usable = np.isfinite(t_ms) & np.isfinite(ir) & (ir > 0)
+        t_ms = t_ms[usable]
+        ir = ir[usable]
+        if ir.size < 3:
+            return None
+
+        dt = np.diff(t_ms)
+        dt = dt[dt > 0]
+        if dt.size == 0:
+            return None
+        fs = 1000.0 / float(np.median(dt))
+        if ir.size / fs < cls.MIN_PPG_SECONDS:
+            return None
+
+        # Remove the DC level / slow drift, then suppress sample noise
+        trend_len = max(1, int(round(fs)))
+        ac = ir - np.convolve(ir, np.ones(trend_len) / trend_len, mode='same')
+        smooth_len = max(1, int(round(fs * 0.15)))
+        ac = np.convolve(ac, np.ones(smooth_len) / smooth_len, mode='same')
+        # Drop the edges, where the moving averages run off the window
+        edge = trend_len // 2
+        ac = ac[edge:ac.size - edge]
+        spread = float(np.std(ac))
+        if spread <= 0:
+            return None
+
+        min_distance = max(1, int(fs * 60.0 / cls.HR_MAX_BPM))
+        peaks, _ = find_peaks(ac, distance=min_distance, prominence=0.5 * spread)
+        if peaks.size < 3:
+            return None
+
+        # Beat intervals from the peak timestamps, not index distances, so
+        # skipped samples and gaps between batches do not shorten them
+        rr_ms = float(np.median(np.diff(t_ms[peaks + edge])))
+        if rr_ms <= 0:
+            return None
+        hr = 60000.0 / rr_ms
+        if not cls.HR_MIN_BPM <= hr <= cls.HR_MAX_BPM:
+            return None
+        return round(hr, 1)
+
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        """Numeric value of a timestamp, or NaN if it is not a number."""
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float('nan')
+
     @staticmethod
     def _compute_activity_metric(ax: np.ndarray,
                                  ay: np.ndarray,
@@ -1,60 +1,73 @@
 # vitalguard/validation.py
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+
+from .decoding import BatchDecoder
 
 
 class DataValidator:
     """Packet Validator: Ensures the received data format is correct."""
 
     @staticmethod
-    def validate_batch_request(data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+    def validate_batch_request(
+            data: Dict[str, Any]) -> Tuple[bool, Optional[str], Optional[List[Dict[str, Any]]]]:
         """
         Verify batch data request format.
-        Returns: (is_valid, error_message)
+        Compact encodings are expanded here, so the decoded points are
+        returned as well and the caller does not decode the batch again.
+        Returns: (is_valid, error_message, data_points); data_points is
+        None when the request is invalid.
         """
         # Required field check.
         required_fields = ['device_id', 'batch_info', 'data']
         for field in required_fields:
             if field not in data:
-                return False, f"Missing required field: {field}"
+                return False, f"Missing required field: {field}", None
 
         # batch_info validation
         batch_info = data['batch_info']
         required_batch_fields = ['start_cycle', 'end_cycle', 'total_points']
         for field in required_batch_fields:
             if field not in batch_info:
-                return False, f"Missing batch_info field: {field}"
+                return False, f"Missing batch_info field: {field}", None
+
+        encoding = batch_info.get('encoding', BatchDecoder.PLAIN)
+        if encoding not in BatchDecoder.SUPPORTED_ENCODINGS:
+            return False, f"Unsupported batch encoding: {encoding}", None
 
-        # data array validation
-        data_array = data['data']
+        # data array validation (compact encodings are expanded first)
+        try:
+            data_array = BatchDecoder.decode_points(data)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            return False, f"Malformed {encoding} batch data: {e}", None
         if not isinstance(data_array, list) or len(data_array) == 0:
-            return False, "Data array is empty or not a list"
+            return False, "Data array is empty or not a list", None
 
         # Validate the first data point structure
         first_point = data_array[0]
         required_data_fields = ['cycle', 'timestamp', 'vital_signs']
         for field in required_data_fields:
             if field not in first_point:
-                return False, f"Data point missing field: {field}"
+                return False, f"Data point missing field: {field}", None
 
         vital_signs = first_point['vital_signs']
         if 'ppg' not in vital_signs:
-            return False, "Missing PPG data in vital_signs"
+            return False, "Missing PPG data in vital_signs", None
 
         ppg = vital_signs['ppg']
         if 'ir' not in ppg or 'red' not in ppg:
-            return False, "PPG data must contain 'ir' and 'red'"
+            return False, "PPG data must contain 'ir' and 'red'", None
 
         for field in ['heartrate', 'spo2']:
             if field not in ppg:
-                return False, f"Field '{field}' in PPG is missing"
+                return False, f"Field '{field}' in PPG is missing", None
 
         # accel validation
         if 'accel' in vital_signs:
             accel = vital_signs['accel']
             if not isinstance(accel, dict):
-                return False, "accel must be an object with ax/ay/az fields"
+                return False, "accel must be an object with ax/ay/az fields", None
             for axis in ['ax', 'ay', 'az']:
                 if axis not in accel:
-                    return False, f"accel missing field: {axis}"
+                    return False, f"accel missing field: {axis}", None
 
-        return True, None
+        return True, None, data_array